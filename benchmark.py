@@ -0,0 +1,153 @@
+import argparse
+import json
+import platform
+import resource
+import time
+import tracemalloc
+
+import numpy as np
+
+from mdp_model import GHOST, GOAL, WALL, MDPModel
+from policy_iteration import run_policy_iteration
+from q_learning import run_q_learning
+from trace_log import TraceWriter
+from value_iteration import run_value_iteration
+
+DEFAULT_SIZES = [10, 30, 100, 300, 1000]
+
+def generate_grid(rows, cols, wall_density=0.1, num_terminals=2, seed=None):
+    """
+    Génère une grille aléatoire : chaque case est un mur avec la probabilité
+    wall_density, puis num_terminals cases libres deviennent des terminaux (le
+    premier est un but, les suivants alternent fantôme / but). La case de départ
+    (coin inférieur gauche) reste libre.
+    """
+    rng = np.random.default_rng(seed)
+    grid = np.where(rng.random((rows, cols)) < wall_density, WALL, 0).astype(np.int8)
+    start_state = (rows - 1) * cols
+    grid.flat[start_state] = 0
+
+    free = np.flatnonzero(grid.ravel() == 0)
+    free = free[free != start_state]
+    chosen = rng.choice(free, size=min(num_terminals, len(free)), replace=False)
+    for i, s in enumerate(chosen):
+        grid.flat[s] = GOAL if i % 2 == 0 else GHOST
+    return grid
+
+def measure(run, trace_memory=True):
+    """
+    Exécute run() et renvoie son résultat, le temps écoulé et le pic mémoire tracé
+    (octets). tracemalloc ralentit fortement le code Python : le temps vient d'une
+    première exécution sans traçage, le pic mémoire d'une seconde exécution tracée
+    (None si trace_memory est faux).
+    """
+    start_time = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start_time
+
+    peak = None
+    if trace_memory:
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+def benchmark_size(size, wall_density, num_terminals, gamma, tolerance, alpha, num_episodes, algorithms, seed,
+                   trace_memory=True):
+    """Mesure les algorithmes demandés sur une grille aléatoire size x size, sans trace."""
+    grid = generate_grid(size, size, wall_density, num_terminals, seed)
+    model, build_time, build_peak = measure(lambda: MDPModel(grid), trace_memory)
+    num_valid = int(model.valid_mask.sum())
+    log = TraceWriter(None, "off")
+
+    results = []
+    for algorithm in algorithms:
+        if algorithm == "value_iteration":
+            (_, _, iterations), elapsed, peak = measure(
+                lambda: run_value_iteration(model, gamma, tolerance, log, engine="numpy"), trace_memory)
+            backups = iterations * num_valid
+        elif algorithm == "policy_iteration":
+            (_, _, iterations), elapsed, peak = measure(
+                lambda: run_policy_iteration(model, gamma, log, evaluation="sparse", initial_policy={}), trace_memory)
+            # Le temps est dominé par les résolutions creuses, qui ne se comptent pas en
+            # mises à jour de Bellman : pas de débit comparable aux autres algorithmes.
+            backups = None
+        else:
+            (_, updates), elapsed, peak = measure(
+                lambda: run_q_learning(model, gamma, alpha, num_episodes, log, engine="batched", seed=seed), trace_memory)
+            iterations = num_episodes
+            # Pour le Q-learning, une mise à jour TD tient lieu de mise à jour de Bellman.
+            backups = updates
+
+        results.append({
+            "algorithm": algorithm,
+            "rows": size,
+            "cols": size,
+            "valid_states": num_valid,
+            "model_build_time": build_time,
+            "model_peak_bytes": build_peak,
+            "time": elapsed,
+            "iterations": iterations,
+            "backups": backups,
+            "backups_per_second": backups / elapsed if backups is not None and elapsed > 0 else None,
+            "peak_traced_bytes": peak,
+            # Pic de mémoire résidente du processus depuis son lancement (Ko sous Linux).
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        })
+    return results
+
+def run_benchmark(sizes=DEFAULT_SIZES, wall_density=0.1, num_terminals=2, gamma=0.9, tolerance=0.01, alpha=0.5,
+                  num_episodes=100, algorithms=("value_iteration", "policy_iteration", "q_learning"), seed=0,
+                  trace_memory=True):
+    """Mesure les trois algorithmes pour chaque taille de grille et renvoie un rapport sérialisable en JSON."""
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "settings": {
+            "wall_density": wall_density,
+            "num_terminals": num_terminals,
+            "gamma": gamma,
+            "tolerance": tolerance,
+            "alpha": alpha,
+            "num_episodes": num_episodes,
+            "seed": seed,
+            "trace_memory": trace_memory,
+        },
+        "results": [],
+    }
+    for size in sizes:
+        report["results"].extend(benchmark_size(size, wall_density, num_terminals, gamma, tolerance, alpha,
+                                                num_episodes, algorithms, seed, trace_memory))
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesure des solveurs sur des grilles aléatoires.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--wall-density", type=float, default=0.1)
+    parser.add_argument("--terminals", type=int, default=2)
+    parser.add_argument("--gamma", type=float, default=0.9)
+    parser.add_argument("--tolerance", type=float, default=0.01)
+    parser.add_argument("--alpha", type=float, default=0.5)
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--algorithms", nargs="+", default=["value_iteration", "policy_iteration", "q_learning"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="ne pas mesurer le pic mémoire avec tracemalloc")
+    parser.add_argument("--output", default=None, help="fichier JSON (sortie standard par défaut)")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.sizes, args.wall_density, args.terminals, args.gamma, args.tolerance, args.alpha,
+                           args.episodes, args.algorithms, args.seed, not args.no_memory)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import json
+
+import numpy as np
+
+from mdp_model import ACTIONS, GHOST, GOAL, MOVES, OUTCOMES, WALL
+
+# Les 8 directions dans le sens horaire depuis le haut : les dérives d'une action
+# sont les deux directions voisines dans cette liste.
+MOVES_8 = [(-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1)]
+ACTIONS_8 = ['haut', 'haut-droite', 'droite', 'bas-droite', 'bas', 'bas-gauche', 'gauche', 'haut-gauche']
+
+# Noms des codes de case utilisables dans une spécification.
+CELL_CODES = {"empty": 0, "goal": GOAL, "ghost": GHOST}
+DEFAULT_CELL_REWARDS = {0: -0.04, GOAL: 1.0, GHOST: -1.0}
+
+class Dynamics:
+    """
+    Spécification déclarative de la dynamique d'une grille, compilée une seule fois
+    en tableaux par MDPModel (voir compile) :
+    - moves : déplacement (dl, dc) de chaque direction ;
+    - slip : matrice (actions x directions), probabilité de partir dans chaque
+      direction quand l'action est choisie (chaque ligne somme à 1) ;
+    - actions : nom de chaque action (ligne de slip) ;
+    - cell_rewards : récompense reçue en arrivant sur une case, par code de case
+      (les codes absents valent la récompense des cases vides) ;
+    - reward_map : tableau (lignes x colonnes) de récompenses qui remplace
+      cell_rewards case par case.
+    Comme pour la dynamique d'origine, un déplacement vers un mur ou hors de la
+    grille laisse l'agent sur place ; seule la case d'arrivée compte, y compris
+    en diagonale.
+    """
+
+    def __init__(self, moves, slip, actions, cell_rewards=None, reward_map=None):
+        self.moves = [tuple(move) for move in moves]
+        self.slip = np.asarray(slip, dtype=np.float64)
+        self.actions = list(actions)
+        if self.slip.shape != (len(self.actions), len(self.moves)):
+            raise ValueError(f"La matrice de dérive doit être de forme ({len(self.actions)}, {len(self.moves)})")
+        if (self.slip < 0).any() or not np.allclose(self.slip.sum(axis=1), 1.0):
+            raise ValueError("Chaque ligne de la matrice de dérive doit être une distribution de probabilité")
+        self.cell_rewards = {**DEFAULT_CELL_REWARDS, **(cell_rewards or {})}
+        self.reward_map = None if reward_map is None else np.asarray(reward_map, dtype=np.float64)
+
+    @classmethod
+    def four_connected(cls, p_intended=0.8, cell_rewards=None, reward_map=None):
+        """Dynamique d'origine (ACTIONS, dérives orthogonales), avec p_intended pour la direction voulue."""
+        slip = np.zeros((len(ACTIONS), len(MOVES)))
+        # Arrondi pour que 0.8 donne des dérives de 0.1 exactement, comme OUTCOME_PROBS.
+        drift = round((1 - p_intended) / 2, 12)
+        for a, outcomes in enumerate(OUTCOMES):
+            for d, prob in zip(outcomes, [p_intended, drift, drift]):
+                slip[a, d] += prob
+        return cls(MOVES, slip, ACTIONS, cell_rewards, reward_map)
+
+    @classmethod
+    def eight_connected(cls, p_intended=0.8, cell_rewards=None, reward_map=None):
+        """Déplacements diagonaux compris : l'agent dérive vers l'une des deux directions voisines."""
+        n = len(MOVES_8)
+        slip = np.zeros((n, n))
+        drift = round((1 - p_intended) / 2, 12)
+        for a in range(n):
+            slip[a, a] = p_intended
+            slip[a, (a - 1) % n] += drift
+            slip[a, (a + 1) % n] += drift
+        return cls(MOVES_8, slip, ACTIONS_8, cell_rewards, reward_map)
+
+    @classmethod
+    def from_spec(cls, spec):
+        """
+        Construit la dynamique d'un dictionnaire ou d'un fichier JSON, par exemple
+        {"connectivity": 8, "p_intended": 0.7, "rewards": {"empty": -0.1, "goal": 2}}.
+        "moves", "slip" et "actions" décrivent une dynamique quelconque à la place de
+        "connectivity" (4 ou 8) ; "reward_map" est une liste de lignes.
+        """
+        if isinstance(spec, str):
+            with open(spec, 'r', encoding='utf-8') as f:
+                spec = json.load(f)
+        cell_rewards = {}
+        for name, value in spec.get("rewards", {}).items():
+            cell_rewards[CELL_CODES[name] if name in CELL_CODES else int(name)] = float(value)
+        reward_map = spec.get("reward_map")
+        if "slip" in spec:
+            return cls(spec["moves"], spec["slip"], spec["actions"], cell_rewards, reward_map)
+
+        connectivity = spec.get("connectivity", 4)
+        if connectivity not in (4, 8):
+            raise ValueError(f"Connexité inconnue : {connectivity}")
+        build = cls.four_connected if connectivity == 4 else cls.eight_connected
+        return build(spec.get("p_intended", 0.8), cell_rewards, reward_map)
+
+    def fingerprint(self):
+        """Texte qui identifie la dynamique (empreinte du cache des modèles compilés)."""
+        parts = [repr(self.moves), repr(self.actions), self.slip.tobytes().hex(), repr(sorted(self.cell_rewards.items()))]
+        if self.reward_map is not None:
+            parts.append(self.reward_map.tobytes().hex())
+        return "|".join(parts)
+
+    def state_rewards(self, cells, states=None):
+        """Récompense reçue en arrivant sur chaque case de la grille cells (ou seulement sur states)."""
+        flat = np.asarray(cells).ravel()
+        if states is None:
+            states = np.arange(len(flat))
+        if self.reward_map is not None:
+            return self.reward_map.ravel()[states].copy()
+        codes = flat[states]
+        rewards = np.full(len(states), self.cell_rewards[0])
+        for code, value in self.cell_rewards.items():
+            rewards[codes == code] = value
+        return rewards
+
+    def compile(self, cells, states=None, width=0):
+        """
+        Calcule pour chaque état de states (tous par défaut) et chaque action les
+        états d'arrivée possibles et leurs probabilités. Les issues qui mènent au même
+        état (rebonds sur un mur ou un bord) sont fusionnées et leurs probabilités
+        additionnées ; les issues sont rangées par probabilité décroissante (l'issue 0
+        est la plus probable) et complétées par des issues de probabilité nulle
+        (vers l'état lui-même) jusqu'à au moins width colonnes.
+        Renvoie next_states et probs, tableaux (états, actions, issues).
+        """
+        cells = np.asarray(cells)
+        rows, cols = cells.shape
+        flat = cells.ravel()
+        if states is None:
+            states = np.arange(flat.size)
+        states = np.asarray(states, dtype=np.int64)
+        r, c = states // cols, states % cols
+
+        targets = np.empty((len(states), len(self.moves)), dtype=np.int64)
+        for d, (dr, dc) in enumerate(self.moves):
+            nr, nc = r + dr, c + dc
+            inside = (nr >= 0) & (nr < rows) & (nc >= 0) & (nc < cols)
+            target = np.where(inside, nr * cols + nc, states)
+            targets[:, d] = np.where(flat[target] == WALL, states, target)
+
+        # Seules les directions de probabilité non nulle sont gardées pour chaque action.
+        num_outcomes = int((self.slip > 0).sum(axis=1).max())
+        directions = np.argsort(-self.slip, axis=1, kind='stable')[:, :num_outcomes]
+        outcome_probs = np.take_along_axis(self.slip, directions, axis=1)
+        next_states = targets[:, directions].reshape(-1, num_outcomes)
+        probs = np.broadcast_to(outcome_probs[None], (len(states),) + outcome_probs.shape).reshape(-1, num_outcomes)
+
+        # Fusion des doublons : tri des issues par état d'arrivée puis somme par groupe.
+        order = np.argsort(next_states, axis=1, kind='stable')
+        next_states = np.take_along_axis(next_states, order, axis=1)
+        probs = np.take_along_axis(probs, order, axis=1)
+        first = np.ones(next_states.shape, dtype=bool)
+        first[:, 1:] = next_states[:, 1:] != next_states[:, :-1]
+        group = np.cumsum(first, axis=1) - 1
+        width = max(width, int(group[:, -1].max(initial=0)) + 1)
+
+        pairs = np.arange(len(next_states))
+        merged_states = np.repeat(np.repeat(states, len(self.actions))[:, None], width, axis=1)
+        merged_probs = np.zeros((len(next_states), width))
+        merged_states[pairs[:, None], group] = next_states
+        np.add.at(merged_probs, (np.broadcast_to(pairs[:, None], group.shape), group), probs)
+
+        order = np.argsort(-merged_probs, axis=1, kind='stable')
+        merged_states = np.take_along_axis(merged_states, order, axis=1)
+        merged_probs = np.take_along_axis(merged_probs, order, axis=1)
+        shape = (len(states), len(self.actions), width)
+        return merged_states.reshape(shape), merged_probs.reshape(shape)
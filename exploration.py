@@ -0,0 +1,153 @@
+import numpy as np
+
+# Règles de choix d'action : "greedy" est la règle d'origine (action gloutonne,
+# égalités départagées au hasard), les autres explorent avec un paramètre qui
+# décroît au fil des essais (epsilon, température ou coefficient du bonus UCB).
+EXPLORATION_RULES = ("greedy", "epsilon", "softmax", "ucb")
+# Valeurs de départ et d'arrivée du paramètre de chaque règle.
+DEFAULT_RANGES = {"epsilon": (1.0, 0.05), "softmax": (1.0, 0.01), "ucb": (1.0, 0.1)}
+LEARNING_RATES = ("constant", "visits")
+
+class DecaySchedule:
+    """
+    Paramètre qui passe de start à end en decay_episodes essais, linéairement
+    (kind="linear") ou géométriquement (kind="exponential"), puis reste à end.
+    """
+
+    def __init__(self, start, end, decay_episodes, kind="exponential"):
+        if kind not in ("linear", "exponential"):
+            raise ValueError(f"Décroissance inconnue : {kind}")
+        if kind == "exponential" and (start <= 0 or end <= 0):
+            raise ValueError("Une décroissance exponentielle demande des valeurs strictement positives")
+        self.start, self.end = float(start), float(end)
+        self.decay_episodes = max(int(decay_episodes), 1)
+        self.kind = kind
+
+    def __call__(self, episode):
+        progress = min(episode / self.decay_episodes, 1.0)
+        if self.kind == "linear":
+            return self.start + (self.end - self.start) * progress
+        return self.start * (self.end / self.start) ** progress
+
+class Exploration:
+    """
+    Choix des actions du Q-learning et pas d'apprentissage, à partir du nombre de
+    visites de chaque paire (état, action) :
+    - rule="epsilon" : action uniforme avec la probabilité epsilon, gloutonne sinon ;
+    - rule="softmax" : tirage selon exp(Q / température) ;
+    - rule="ucb" : argmax de Q + c * sqrt(ln N(s) / N(s, a)), les actions jamais
+      essayées dans s passant en premier ;
+    le paramètre de la règle suit schedule (un DecaySchedule), appelé avec le numéro
+    de l'essai courant. learning_rate="visits" remplace le pas constant alpha par
+    alpha / N(s, a) ** omega (0.5 < omega <= 1) : il décroît avec les visites de
+    chaque paire, ce qui fait converger Q malgré le hasard des transitions.
+    Les visites (counts) ne sont comptées que si la règle ou le pas s'en servent.
+    Les tirages viennent d'un numpy Generator (seed : graine ou Generator).
+    """
+
+    def __init__(self, num_states, num_actions, rule="greedy", schedule=None, learning_rate="constant",
+                 omega=0.8, seed=None):
+        if rule not in EXPLORATION_RULES:
+            raise ValueError(f"Règle d'exploration inconnue : {rule}")
+        if learning_rate not in LEARNING_RATES:
+            raise ValueError(f"Pas d'apprentissage inconnu : {learning_rate}")
+        if rule != "greedy" and schedule is None:
+            raise ValueError(f"La règle {rule} demande un schedule")
+        self.rule = rule
+        self.schedule = schedule
+        self.learning_rate = learning_rate
+        self.omega = omega
+        self.rng = np.random.default_rng(seed)
+        self.counts = np.zeros((num_states, num_actions), dtype=np.int64)
+        self.count_visits = rule == "ucb" or learning_rate == "visits"
+        self.parameter = None if schedule is None else schedule(0)
+
+    @classmethod
+    def from_spec(cls, spec, num_states, num_actions, num_episodes, learning_rate="constant", seed=None):
+        """
+        Construit l'exploration d'un nom de règle ou d'un dictionnaire, par exemple
+        {"rule": "epsilon", "start": 1.0, "end": 0.05, "decay_episodes": 500,
+        "decay": "linear"}. Par défaut le paramètre décroît géométriquement de
+        DEFAULT_RANGES[rule] sur la première moitié des num_episodes essais.
+        """
+        if isinstance(spec, str):
+            spec = {"rule": spec}
+        rule = spec.get("rule", "greedy")
+        schedule = None
+        if rule in DEFAULT_RANGES:
+            start, end = DEFAULT_RANGES[rule]
+            schedule = DecaySchedule(spec.get("start", start), spec.get("end", end),
+                                     spec.get("decay_episodes", num_episodes // 2), spec.get("decay", "exponential"))
+        return cls(num_states, num_actions, rule, schedule, learning_rate, spec.get("omega", 0.8), seed)
+
+    def set_episode(self, episode):
+        """Met à jour le paramètre de la règle pour l'essai episode (compté à partir de 0)."""
+        if self.schedule is not None:
+            self.parameter = self.schedule(episode)
+
+    def select(self, state, q):
+        """Action choisie dans state, q étant la ligne Q[state]."""
+        return int(self.select_batch(np.array([state]), q[None])[0])
+
+    def select_batch(self, states, q):
+        """Action choisie pour chaque état de states, q étant Q[states]."""
+        keys = self.rng.random(q.shape)
+        if self.rule == "softmax":
+            # Tirage de Gumbel : argmax(q / T + G) suit la loi softmax(q / T).
+            return (q / self.parameter - np.log(-np.log(keys))).argmax(axis=1)
+        if self.rule == "ucb":
+            counts = self.counts[states]
+            bonus = self.parameter * np.sqrt(np.log(np.maximum(counts.sum(axis=1), 1))[:, None]
+                                             / np.maximum(counts, 1))
+            q = np.where(counts == 0, np.inf, q + bonus)
+
+        # Action gloutonne, égalités départagées par une clé aléatoire.
+        ties = q == q.max(axis=1, keepdims=True)
+        actions = np.where(ties, keys, -1.0).argmax(axis=1)
+        if self.rule == "epsilon":
+            explore = self.rng.random(len(actions)) < self.parameter
+            actions[explore] = self.rng.integers(q.shape[1], size=int(explore.sum()))
+        return actions
+
+    def visit(self, states, actions, alpha):
+        """
+        Compte une visite de chaque paire (states[i], actions[i]) et renvoie le pas
+        d'apprentissage de chacune (alpha si learning_rate="constant").
+        """
+        if self.count_visits:
+            np.add.at(self.counts, (states, actions), 1)
+        if self.learning_rate == "constant":
+            return alpha
+        return alpha / self.counts[states, actions] ** self.omega
+
+class ConvergenceMonitor:
+    """
+    Critère d'arrêt anticipé du Q-learning : l'apprentissage s'arrête quand, sur
+    window essais consécutifs, la politique gloutonne (argmax de Q sur les états
+    valides) n'a pas changé et aucune mise à jour n'a modifié Q de plus de tolerance.
+    episodes compte les essais vus, converged indique si l'arrêt a été atteint.
+    """
+
+    def __init__(self, valid_mask, window, tolerance=1e-3):
+        self.valid_mask = valid_mask
+        self.window = window
+        self.tolerance = tolerance
+        self.policy = None
+        self.stable_episodes = 0
+        self.episodes = 0
+        self.converged = False
+
+    def update(self, Q, max_delta, episodes=1):
+        """
+        À appeler après episodes essais, max_delta étant la plus grande variation
+        d'une valeur de Q sur ces essais. Renvoie True quand l'arrêt est atteint.
+        """
+        self.episodes += episodes
+        policy = Q[self.valid_mask].argmax(axis=1)
+        if self.policy is not None and max_delta < self.tolerance and np.array_equal(policy, self.policy):
+            self.stable_episodes += episodes
+        else:
+            self.stable_episodes = 0
+        self.policy = policy
+        self.converged = self.stable_episodes >= self.window
+        return self.converged
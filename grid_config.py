@@ -0,0 +1,151 @@
+import hashlib
+import os
+
+import numpy as np
+
+from dynamics import Dynamics
+from mdp_model import MDPModel
+
+# Ordre des paramètres positionnels (anciens fichiers sans nom) de chaque solveur.
+POSITIONAL_PARAMS = {
+    "value_iteration": ("gamma", "tolerance"),
+    "policy_iteration": ("gamma",),
+    "q_learning": ("gamma", "alpha", "num_episodes"),
+}
+
+PARAM_TYPES = {"gamma": float, "tolerance": float, "alpha": float, "num_episodes": int}
+
+# À incrémenter quand la disposition des tableaux compilés de MDPModel change.
+MODEL_CACHE_VERSION = 1
+
+def parse_param(name, value):
+    """Convertit la valeur d'un paramètre selon PARAM_TYPES (float par défaut)."""
+    return PARAM_TYPES.get(name, float)(float(value))
+
+def read_param_line(line, params, values):
+    """
+    Range une ligne sans virgule d'un fichier texte : "nom = valeur" dans le
+    dictionnaire params, une valeur seule (ancien format) à la suite de values.
+    """
+    if '=' in line:
+        name, value = (part.strip() for part in line.split('=', 1))
+        params[name] = parse_param(name, value)
+    else:
+        values.append(line)
+
+def assign_positional(params, values, positional, filename):
+    """
+    Attribue les valeurs sans nom aux paramètres de positional, dans l'ordre, sans
+    écraser ceux de l'en-tête (ignorées si positional est None).
+    """
+    if positional is None:
+        return
+    if len(values) > len(positional):
+        raise ValueError(f"{filename} : {len(values)} paramètres sans nom pour {len(positional)} attendus")
+    for name, value in zip(positional, values):
+        params.setdefault(name, parse_param(name, value))
+
+def load_config(filename, positional=POSITIONAL_PARAMS["value_iteration"]):
+    """
+    Lit une grille et ses paramètres. Formats acceptés :
+    - .npy : la grille seule (les paramètres sont alors passés au solveur) ;
+    - .npz : la grille sous la clé "grid" et un scalaire par paramètre ;
+    - texte : un en-tête facultatif de lignes "nom = valeur", les lignes de grille
+      (valeurs séparées par des virgules) puis, comme dans les anciens fichiers,
+      des valeurs seules attribuées dans l'ordre de positional (ignorées si
+      positional est None).
+    La grille texte est lue d'un bloc par np.loadtxt. Renvoie la grille (int8) et
+    le dictionnaire des paramètres.
+    """
+    if filename.endswith(".npy"):
+        return np.load(filename).astype(np.int8, copy=False), {}
+    if filename.endswith(".npz"):
+        with np.load(filename) as data:
+            params = {name: parse_param(name, data[name]) for name in data.files if name != "grid"}
+            return data["grid"].astype(np.int8, copy=False), params
+
+    with open(filename, 'r') as f:
+        lines = [line.strip() for line in f if line.strip()]
+
+    params = {}
+    grid_lines = []
+    values = []
+    for line in lines:
+        if ',' in line:
+            grid_lines.append(line)
+        else:
+            read_param_line(line, params, values)
+    assign_positional(params, values, positional, filename)
+
+    grid = np.loadtxt(grid_lines, delimiter=',', dtype=np.int8, ndmin=2)
+    return grid, params
+
+def solver_params(params, solver, filename, **values):
+    """
+    Paramètres requis par solver (dans l'ordre de POSITIONAL_PARAMS[solver]) : les
+    valeurs passées par l'appelant (hors None) l'emportent sur celles lues dans
+    filename. Lève ValueError si l'un d'eux manque (une grille .npy n'en contient aucun).
+    """
+    result = []
+    for name in POSITIONAL_PARAMS[solver]:
+        value = values.get(name)
+        if value is None:
+            value = params.get(name)
+        if value is None:
+            raise ValueError(f"{filename} : paramètre {name} manquant, à écrire dans le fichier ou à passer au solveur")
+        result.append(parse_param(name, value))
+    return result
+
+def grid_hash(grid, dynamics=None):
+    """Empreinte SHA-256 de la forme et du contenu d'une grille (et de sa dynamique si elle est fournie)."""
+    cells = np.ascontiguousarray(grid, dtype=np.int8)
+    digest = hashlib.sha256(f"{MODEL_CACHE_VERSION}:{cells.shape}".encode())
+    digest.update(cells.tobytes())
+    if dynamics is not None:
+        digest.update(dynamics.fingerprint().encode())
+    return digest.hexdigest()
+
+def load_dynamics(dynamics):
+    """Accepte None (dynamique d'origine), une Dynamics, ou une spécification (dictionnaire ou fichier JSON)."""
+    if dynamics is None or isinstance(dynamics, Dynamics):
+        return dynamics
+    return Dynamics.from_spec(dynamics)
+
+def load_model(grid, cache_dir=None, dynamics=None):
+    """
+    Renvoie le modèle compilé de la grille, avec la dynamique dynamics (voir
+    load_dynamics). Avec cache_dir, les tableaux compilés (next_states, rewards et,
+    pour une dynamique configurée, probs) sont enregistrés dans
+    cache_dir/model-<empreinte>/ au premier appel, puis rouverts en memmap lecture
+    seule : une carte déjà vue démarre sans recompilation, quelle que soit sa taille.
+    """
+    dynamics = load_dynamics(dynamics)
+    if cache_dir is None:
+        return MDPModel(grid, dynamics=dynamics)
+
+    cells = np.ascontiguousarray(grid, dtype=np.int8)
+    path = os.path.join(cache_dir, f"model-{grid_hash(cells, dynamics)}")
+    if os.path.isdir(path):
+        return MDPModel(cells,
+                        next_states=np.load(os.path.join(path, "next_states.npy"), mmap_mode='r'),
+                        rewards=np.load(os.path.join(path, "rewards.npy"), mmap_mode='r'),
+                        dynamics=dynamics,
+                        probs=None if dynamics is None else np.load(os.path.join(path, "probs.npy"), mmap_mode='r'))
+
+    model = MDPModel(cells, dynamics=dynamics)
+    # Écriture dans un répertoire temporaire renommé à la fin : un autre processus
+    # ne voit jamais un cache incomplet.
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(tmp_path, exist_ok=True)
+    np.save(os.path.join(tmp_path, "next_states.npy"), model.next_states)
+    np.save(os.path.join(tmp_path, "rewards.npy"), model.rewards)
+    if dynamics is not None:
+        np.save(os.path.join(tmp_path, "probs.npy"), model.probs)
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # Un autre processus a rempli le cache entre-temps.
+        for name in os.listdir(tmp_path):
+            os.remove(os.path.join(tmp_path, name))
+        os.rmdir(tmp_path)
+    return model
@@ -0,0 +1,81 @@
+import heapq
+
+import numpy as np
+
+def local_predecessors(model, s):
+    """
+    Prédécesseurs valides de s (tableau). Une transition ne mène qu'à la case
+    atteinte par un déplacement ou à la case elle-même : il suffit d'examiner s et
+    les cases d'où un déplacement de model.moves mène à s (s moins ce déplacement).
+    """
+    r, c = divmod(s, model.cols)
+    candidates = [s]
+    for dr, dc in model.moves:
+        nr, nc = r - dr, c - dc
+        if 0 <= nr < model.rows and 0 <= nc < model.cols:
+            candidates.append(nr * model.cols + nc)
+    candidates = np.array(candidates)
+    keep = model.valid_mask[candidates] & (model.next_states[candidates] == s).any(axis=(1, 2))
+    return candidates[keep]
+
+def resolve_after_changes(model, U, changes, gamma, tolerance, log, best_actions=None):
+    """
+    Re-résout la grille après la modification de quelques cases, en partant de la
+    solution précédente (U et best_actions, venant de l'itération de la valeur ou
+    de la politique) au lieu de repartir de U = 0.
+    changes associe (ligne, colonne) à la nouvelle valeur de la case. Le modèle est
+    mis à jour sur place (MDPModel.update_cells), puis un balayage prioritaire part
+    des états touchés et de leurs prédécesseurs. Un état n'est remis à jour que si
+    son erreur de Bellman dépasse la tolérance : à la fin, aucune erreur ne la
+    dépasse et |U - U*| reste sous tolérance / (1 - gamma) en tout état. Seule la
+    zone où la modification se fait sentir est parcourue.
+    Renvoie U, la meilleure action de chaque état et le nombre de mises à jour.
+    """
+    affected = model.update_cells(changes)
+    U = np.array(U, dtype=np.float64)
+    U[~model.valid_mask] = 0.0
+    next_states, rewards, probs = model.next_states, model.rewards, model.probs
+
+    def q_rows(states):
+        return (probs[states] * (rewards[states] + gamma * U[next_states[states]])).sum(axis=2)
+
+    seeds = np.unique(np.concatenate([affected] + [local_predecessors(model, s) for s in affected.tolist()]))
+    seeds = seeds[model.valid_mask[seeds]]
+    errors = np.abs(q_rows(seeds).max(axis=1) - U[seeds])
+
+    priority = dict(zip(seeds.tolist(), errors.tolist()))
+    heap = [(-error, s) for s, error in priority.items() if error > tolerance]
+    heapq.heapify(heap)
+    backups = len(seeds)
+
+    updates = 0
+    touched = [seeds]
+    while heap:
+        neg_priority, s = heapq.heappop(heap)
+        if priority.get(s) != -neg_priority:
+            continue
+        U[s] = q_rows([s]).max()
+        priority[s] = 0.0
+        updates += 1
+
+        preds = local_predecessors(model, s)
+        touched.append(preds)
+        backups += len(preds)
+        for p, error in zip(preds.tolist(), np.abs(q_rows(preds).max(axis=1) - U[preds]).tolist()):
+            if error > tolerance and error != priority.get(p):
+                priority[p] = error
+                heapq.heappush(heap, (-error, p))
+
+    if best_actions is None:
+        best_actions = model.q_values(U, gamma).argmax(axis=1)
+    else:
+        # Seuls les états dont un successeur a changé de valeur peuvent changer d'action.
+        touched = np.unique(np.concatenate(touched))
+        best_actions = np.array(best_actions)
+        best_actions[touched] = q_rows(touched).argmax(axis=1)
+
+    if log.summary:
+        log.write(f"Cases modifiées : {len(changes)}, états recompilés : {len(affected)}\n")
+        log.write(f"Mises à jour prioritaires : {updates}\n")
+        log.write(f"Nombre de mises à jour de Bellman : {backups}\n\n")
+    return U, best_actions, updates
@@ -0,0 +1,169 @@
+import numpy as np
+
+ACTIONS = ['haut', 'bas', 'gauche', 'droite']
+ACTION_INDEX = {a: i for i, a in enumerate(ACTIONS)}
+
+# Déplacement (dl, dc) de chaque action, dans l'ordre de ACTIONS.
+MOVES = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+# Pour chaque action : direction voulue puis les deux dérives orthogonales.
+OUTCOMES = [[0, 2, 3], [1, 2, 3], [2, 0, 1], [3, 0, 1]]
+OUTCOME_PROBS = [0.8, 0.1, 0.1]
+
+WALL = 3
+GOAL = 1
+GHOST = 2
+
+
+def cell_rewards(cells):
+    """Récompense reçue en arrivant sur chaque case : +1 au but, -1 au fantôme, -0.04 ailleurs."""
+    return np.where(cells == GOAL, 1.0, np.where(cells == GHOST, -1.0, -0.04))
+
+
+class MDPModel:
+    """
+    Modèle compilé d'une grille, construit une seule fois et partagé par les solveurs.
+    Les actions sont codées par leur indice dans ACTIONS ; next_states[s, a, k] donne
+    l'état atteint par la k-ième issue de l'action a (0 : voulue, 1 et 2 : dérives),
+    avec la probabilité probs[s, a, k] et la récompense rewards[s, a, k].
+    next_states et rewards peuvent être fournis déjà compilés (voir grid_config.load_model).
+    dynamics (voir dynamics.Dynamics) remplace la dynamique d'origine (4 actions,
+    0.8 / 0.1 / 0.1, récompenses de cell_rewards) : les issues de chaque paire
+    (état, action) sont alors fusionnées et rangées par probabilité décroissante,
+    et probs est un vrai tableau (fourni avec next_states s'ils viennent du cache).
+    """
+
+    def __init__(self, grid, next_states=None, rewards=None, dynamics=None, probs=None):
+        cells = np.asarray(grid, dtype=np.int8)
+        self.grid = cells
+        self.rows, self.cols = cells.shape
+        self.num_states = self.rows * self.cols
+
+        flat = cells.ravel()
+        self.wall_mask = flat == WALL
+        self.terminal_mask = (flat == GOAL) | (flat == GHOST)
+        self.valid_mask = ~(self.wall_mask | self.terminal_mask)
+        self.dynamics = dynamics
+        self.actions = ACTIONS if dynamics is None else dynamics.actions
+        self.action_index = ACTION_INDEX if dynamics is None else {a: i for i, a in enumerate(self.actions)}
+        self.moves = MOVES if dynamics is None else dynamics.moves
+        self.state_rewards = cell_rewards(flat) if dynamics is None else dynamics.state_rewards(cells)
+
+        if dynamics is None:
+            self.next_states = self._build_next_states(flat) if next_states is None else next_states
+            self.probs = np.broadcast_to(np.array(OUTCOME_PROBS), self.next_states.shape)
+        elif next_states is None:
+            self.next_states, self.probs = dynamics.compile(cells)
+        else:
+            self.next_states, self.probs = next_states, probs
+        self.rewards = self.state_rewards[self.next_states] if rewards is None else rewards
+
+    def _build_next_states(self, flat, states=None):
+        """
+        Calcule les états d'arrivée de chaque issue (rebonds sur les bords et les murs
+        inclus), pour tous les états ou seulement pour ceux de states.
+        """
+        if states is None:
+            states = np.arange(self.num_states)
+        r = states // self.cols
+        c = states % self.cols
+
+        moves = np.empty((len(states), len(ACTIONS)), dtype=np.int64)
+        for a, (dr, dc) in enumerate(MOVES):
+            nr = r + dr
+            nc = c + dc
+            inside = (nr >= 0) & (nr < self.rows) & (nc >= 0) & (nc < self.cols)
+            target = np.where(inside, nr * self.cols + nc, states)
+            moves[:, a] = np.where(flat[target] == WALL, states, target)
+
+        return moves[:, OUTCOMES]
+
+    def update_cells(self, changes):
+        """
+        Modifie sur place quelques cases (dictionnaire (ligne, colonne) -> valeur) et
+        ne recompile que les états touchés : une case n'influence que ses propres
+        transitions et celles des cases d'où un déplacement y mène (la case moins ce
+        déplacement, une par déplacement). Renvoie ces états, triés.
+        """
+        self.grid = self.grid.copy()
+        changed = []
+        for (r, c), value in changes.items():
+            self.grid[r, c] = value
+            changed.append(r * self.cols + c)
+        changed = np.array(changed, dtype=np.int64)
+
+        r, c = changed // self.cols, changed % self.cols
+        affected = [changed]
+        for dr, dc in self.moves:
+            nr, nc = r - dr, c - dc
+            inside = (nr >= 0) & (nr < self.rows) & (nc >= 0) & (nc < self.cols)
+            affected.append((nr * self.cols + nc)[inside])
+        affected = np.unique(np.concatenate(affected))
+
+        flat = self.grid.ravel()
+        self.wall_mask[changed] = flat[changed] == WALL
+        self.terminal_mask[changed] = (flat[changed] == GOAL) | (flat[changed] == GHOST)
+        self.valid_mask[changed] = ~(self.wall_mask[changed] | self.terminal_mask[changed])
+        if self.dynamics is None:
+            self.state_rewards[changed] = cell_rewards(flat[changed])
+        else:
+            self.state_rewards[changed] = self.dynamics.state_rewards(self.grid, changed)
+
+        # Les tableaux rouverts depuis le cache sont en lecture seule.
+        if not self.next_states.flags.writeable:
+            self.next_states = np.array(self.next_states)
+        if not self.rewards.flags.writeable:
+            self.rewards = np.array(self.rewards)
+        if self.dynamics is None:
+            self.next_states[affected] = self._build_next_states(flat, affected)
+        else:
+            self._recompile(affected)
+        self.rewards[affected] = self.state_rewards[self.next_states[affected]]
+        return affected
+
+    def _recompile(self, states):
+        """Recompile les issues de states ; les tableaux sont élargis si une fusion de rebonds disparaît."""
+        width = self.next_states.shape[2]
+        next_states, probs = self.dynamics.compile(self.grid, states, width)
+        if next_states.shape[2] > width:
+            extra = next_states.shape[2] - width
+            all_states = np.arange(self.num_states)[:, None, None]
+            self.next_states = np.concatenate(
+                [self.next_states, np.broadcast_to(all_states, self.next_states.shape[:2] + (extra,))], axis=2)
+            self.probs = np.concatenate([self.probs, np.zeros(self.probs.shape[:2] + (extra,))], axis=2)
+            self.rewards = self.state_rewards[self.next_states]
+        elif not self.probs.flags.writeable:
+            self.probs = np.array(self.probs)
+        self.next_states[states] = next_states
+        self.probs[states] = probs
+
+    def outcome_thresholds(self):
+        """
+        Probabilités cumulées des issues de chaque paire (état, action) : un tirage u
+        uniforme dans [0, 1) donne l'issue min(nombre de seuils <= u, issues - 1).
+        Les issues de probabilité nulle (en fin de ligne) ont un seuil infini et ne
+        sont jamais tirées. Pour la dynamique d'origine, le tableau n'est qu'une vue.
+        """
+        if self.dynamics is None:
+            return np.broadcast_to(np.cumsum(OUTCOME_PROBS), self.next_states.shape)
+        thresholds = np.cumsum(self.probs, axis=2)
+        last_outcome = (self.probs > 0).sum(axis=2, keepdims=True) - 1
+        thresholds[np.arange(self.probs.shape[2]) >= last_outcome] = np.inf
+        return thresholds
+
+    def q_values(self, U, gamma):
+        """Calcule Q (S, nombre d'actions) pour toutes les paires état-action en une seule opération."""
+        return (self.probs * (self.rewards + gamma * U[self.next_states])).sum(axis=2)
+
+    def predecessors(self):
+        """
+        Liste des prédécesseurs valides de chaque état, au format CSR : les prédécesseurs
+        de s sont indices[indptr[s]:indptr[s + 1]] (sans doublon, dans l'ordre croissant).
+        """
+        sources = np.broadcast_to(np.arange(self.num_states)[:, None, None], self.next_states.shape)
+        keep = self.valid_mask[sources]
+        pairs = np.unique(np.stack([self.next_states[keep], sources[keep]], axis=1), axis=0)
+
+        counts = np.bincount(pairs[:, 0], minlength=self.num_states)
+        indptr = np.concatenate([[0], np.cumsum(counts)])
+        return indptr, pairs[:, 1]
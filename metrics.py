@@ -0,0 +1,63 @@
+import csv
+import json
+import time
+
+# Colonnes du format CSV ; une ligne JSON ne contient que les champs renseignés.
+METRIC_FIELDS = ("solver", "event", "iteration", "residual_sum", "residual_max", "policy_changes",
+                 "episode_length", "episode_return", "phase", "time")
+
+class MetricsWriter:
+    """
+    Récepteur de mesures utilisable comme callback des solveurs : chaque appel
+    writer(event, **champs) écrit une ligne dans filename, au format CSV (colonnes
+    METRIC_FIELDS) ou JSON lines selon format ou l'extension (.csv, .jsonl).
+    Événements émis par les solveurs :
+    - "iteration" : iteration, residual_sum, residual_max, policy_changes, time ;
+    - "episode" : iteration, episode_length, episode_return (retour actualisé) ;
+    - "phase" : phase (model_build, sweep, evaluation, improvement, learning, logging) et time.
+    Les solveurs ne mesurent rien quand leur callback vaut None.
+    """
+
+    def __init__(self, filename, solver="", format=None):
+        self.solver = solver
+        self.format = format or ("csv" if filename.endswith(".csv") else "jsonl")
+        if self.format not in ("csv", "jsonl"):
+            raise ValueError(f"Format de mesures inconnu : {self.format}")
+        self._file = open(filename, 'w', encoding='utf-8', newline='')
+        if self.format == "csv":
+            self._writer = csv.DictWriter(self._file, METRIC_FIELDS, restval="")
+            self._writer.writeheader()
+
+    def __call__(self, event, **fields):
+        record = {"solver": self.solver, "event": event, **fields}
+        if self.format == "csv":
+            self._writer.writerow(record)
+        else:
+            self._file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def open_metrics(metrics, solver):
+    """
+    Prépare le callback d'un solve_* : metrics peut être None (aucune mesure), un nom
+    de fichier (un MetricsWriter est ouvert, à fermer par l'appelant) ou déjà un callback.
+    Renvoie le callback et le MetricsWriter ouvert (ou None).
+    """
+    if metrics is None or callable(metrics):
+        return metrics, None
+    writer = MetricsWriter(metrics, solver)
+    return writer, writer
+
+def report_phase(callback, phase, start_time):
+    """Signale la durée d'une phase commencée à start_time (time.perf_counter())."""
+    if callback is not None:
+        callback("phase", phase=phase, time=time.perf_counter() - start_time)
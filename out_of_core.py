@@ -0,0 +1,167 @@
+import os
+
+import numpy as np
+
+from grid_config import POSITIONAL_PARAMS, assign_positional, read_param_line, solver_params
+from mdp_model import ACTIONS, MOVES, OUTCOME_PROBS, OUTCOMES, GHOST, GOAL, WALL, cell_rewards
+from trace_log import TraceWriter
+
+def stream_config_to_memmap(input_filename, grid_path):
+    """
+    Lit un fichier de configuration ligne par ligne sans jamais charger la grille
+    entière : chaque ligne de grille est écrite en uint8 à la suite dans grid_path.
+    Les lignes sans virgule sont les paramètres, lus comme par grid_config.load_config
+    (en-tête "nom = valeur" ou valeurs seules gamma puis tolérance).
+    Renvoie la forme (lignes, colonnes) de la grille et le dictionnaire des paramètres.
+    """
+    rows = 0
+    cols = None
+    params = {}
+    values = []
+    with open(input_filename, 'r') as f, open(grid_path, 'wb') as out:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if ',' in line:
+                row = np.array(line.split(','), dtype=np.uint8)
+                if cols is None:
+                    cols = len(row)
+                elif len(row) != cols:
+                    raise ValueError(f"Ligne {rows} de longueur {len(row)} au lieu de {cols}")
+                out.write(row.tobytes())
+                rows += 1
+            else:
+                read_param_line(line, params, values)
+    assign_positional(params, values, POSITIONAL_PARAMS["value_iteration"], input_filename)
+    return (rows, cols), params
+
+def band_q_values(cells, U, first, last, gamma):
+    """
+    Calcule Q (4, lignes de la bande, colonnes) pour les lignes first:last d'un bloc
+    cells / U qui contient en plus une ligne de halo au-dessus et au-dessous quand
+    elle existe. Les transitions n'atteignent que les 4 voisins : le halo suffit.
+    """
+    rows, cols = cells.shape
+    band = slice(first, last)
+    own_value = cell_rewards(cells[band]) + gamma * U[band]
+
+    # X[d] : récompense + γU de la case atteinte en allant dans la direction d (rebonds inclus).
+    X = np.empty((len(MOVES), last - first, cols))
+    for d, (dr, dc) in enumerate(MOVES):
+        target_cells = np.full((last - first, cols), WALL, dtype=cells.dtype)
+        target_values = np.zeros((last - first, cols))
+        r0, r1 = first + dr, last + dr
+        src_rows = slice(max(r0, 0), min(r1, rows))
+        dst_rows = slice(max(r0, 0) - r0, (last - first) - (r1 - min(r1, rows)))
+        src_cols = slice(max(dc, 0), cols + min(dc, 0))
+        dst_cols = slice(max(-dc, 0), cols - max(dc, 0))
+        target_cells[dst_rows, dst_cols] = cells[src_rows, src_cols]
+        target_values[dst_rows, dst_cols] = cell_rewards(cells[src_rows, src_cols]) + gamma * U[src_rows, src_cols]
+        X[d] = np.where(target_cells == WALL, own_value, target_values)
+
+    probs = OUTCOME_PROBS
+    return np.stack([probs[0] * X[o[0]] + probs[1] * X[o[1]] + probs[2] * X[o[2]] for o in OUTCOMES])
+
+def run_value_iteration_out_of_core(grid, gamma, tolerance, work_dir, log, band_rows=256, dtype=np.float64):
+    """
+    Itération de la valeur hors mémoire : grid est une grille d'entiers (idéalement un
+    np.memmap), U et U' sont des memmaps de type dtype dans work_dir, et chaque
+    balayage traite la grille par bandes de band_rows lignes avec une ligne de halo
+    de part et d'autre. Seules quelques bandes résident en mémoire à la fois.
+    Renvoie U et la meilleure action de chaque case (memmaps rows x cols, enregistrés
+    dans work_dir/U.npy et work_dir/policy.npy) et le nombre d'itérations.
+    """
+    rows, cols = grid.shape
+    U_path, U_prime_path = os.path.join(work_dir, "U.npy"), os.path.join(work_dir, "U_prime.npy")
+    U = np.lib.format.open_memmap(U_path, mode='w+', dtype=dtype, shape=(rows, cols))
+    U_prime = np.lib.format.open_memmap(U_prime_path, mode='w+', dtype=dtype, shape=(rows, cols))
+    U[:] = 0.0
+    U_prime[:] = 0.0
+
+    def bands():
+        for start in range(0, rows, band_rows):
+            stop = min(start + band_rows, rows)
+            lo, hi = max(start - 1, 0), min(stop + 1, rows)
+            yield start, stop, lo, hi
+
+    iteration = 1
+    while True:
+        sum_diff = 0.0
+        for start, stop, lo, hi in bands():
+            cells = np.asarray(grid[lo:hi])
+            U_block = np.asarray(U[lo:hi], dtype=np.float64)
+            Q = band_q_values(cells, U_block, start - lo, stop - lo, gamma)
+
+            band_cells = cells[start - lo:stop - lo]
+            active = (band_cells != WALL) & (band_cells != GOAL) & (band_cells != GHOST)
+            old = U_block[start - lo:stop - lo]
+            new = np.where(active, Q.max(axis=0), old)
+            U_prime[start:stop] = new
+            sum_diff += float(np.abs(new - old)[active].sum())
+
+        if log.summary:
+            log.write(f"Itération {iteration} : Somme des differences |Us - U'(S)| = {sum_diff:.6f}\n")
+
+        U, U_prime = U_prime, U
+        U_path, U_prime_path = U_prime_path, U_path
+        if sum_diff < tolerance:
+            log.write(f"\nDifference < {tolerance} . Arret des itérations\n\n")
+            break
+        iteration += 1
+
+    U.flush()
+    if U_path != os.path.join(work_dir, "U.npy"):
+        # Après un nombre impair de balayages, le résultat est dans U_prime.npy : il prend la place de U.npy.
+        del U, U_prime
+        os.replace(U_path, U_prime_path)
+        U = np.lib.format.open_memmap(U_prime_path, mode='r+')
+    policy = np.lib.format.open_memmap(os.path.join(work_dir, "policy.npy"), mode='w+', dtype=np.int8,
+                                       shape=(rows, cols))
+    for start, stop, lo, hi in bands():
+        Q = band_q_values(np.asarray(grid[lo:hi]), np.asarray(U[lo:hi], dtype=np.float64),
+                          start - lo, stop - lo, gamma)
+        policy[start:stop] = Q.argmax(axis=0)
+    policy.flush()
+
+    log.write(f"Nombre d'itérations : {iteration}\n")
+    return U, policy, iteration
+
+def solve_value_iteration_out_of_core(input_filename="value-iteration.txt", output_filename="log-file_VI_ooc.txt",
+                                      work_dir=".", band_rows=256, dtype=np.float64, trace="summary",
+                                      gamma=None, tolerance=None):
+    """
+    Résout par itération de la valeur une grille trop grande pour la mémoire. Le
+    fichier de configuration texte est converti en memmap uint8 dans work_dir
+    (grid.u8) ; une grille .npy est ouverte directement en memmap. La grille est
+    ensuite résolue par bandes de lignes.
+    dtype=np.float32 divise par deux la place occupée par U sur le disque.
+    gamma et tolerance remplacent les valeurs du fichier (obligatoires avec une grille
+    .npy) ; un paramètre manquant lève ValueError (voir grid_config.solver_params).
+    Renvoie U et la meilleure action (indice dans ACTIONS) de chaque case.
+    """
+    try:
+        if input_filename.endswith(".npy"):
+            grid, params = np.load(input_filename, mmap_mode='r'), {}
+        else:
+            grid_path = os.path.join(work_dir, "grid.u8")
+            shape, params = stream_config_to_memmap(input_filename, grid_path)
+            grid = np.memmap(grid_path, dtype=np.uint8, mode='r', shape=shape)
+    except FileNotFoundError:
+        print(f"Erreur : Le fichier {input_filename} est introuvable.")
+        return
+
+    gamma, tolerance = solver_params(params, "value_iteration", input_filename, gamma=gamma, tolerance=tolerance)
+
+    with TraceWriter(output_filename, trace) as log:
+        U, policy, _ = run_value_iteration_out_of_core(grid, gamma, tolerance, work_dir, log, band_rows, dtype)
+        if log.summary:
+            log.write("Meilleure action de chaque état (extrait) :\n")
+            labels = {WALL: "MUR", GOAL: "BUT", GHOST: "FANT"}
+            for r in range(min(grid.shape[0], 10)):
+                row = [labels.get(int(cell), ACTIONS[a]) for cell, a in zip(grid[r, :10], policy[r, :10])]
+                log.write(" ".join(f"{label:<8}" for label in row) + "\n")
+    return U, policy
+
+if __name__ == "__main__":
+    solve_value_iteration_out_of_core()
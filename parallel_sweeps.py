@@ -0,0 +1,205 @@
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from mdp_model import GHOST, GOAL, WALL
+from out_of_core import band_q_values
+
+# Commandes transmises aux workers à chaque rendez-vous.
+STOP = 0
+SWEEP = 1
+IMPROVE = 2
+
+def _attach(name, shape, dtype):
+    """Ouvre un bloc de mémoire partagée existant et le présente comme un tableau numpy."""
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def _band_worker(names, shape, num_workers, index, start, stop, barrier):
+    """
+    Boucle d'un worker : il attend une commande, met à jour les lignes start:stop
+    puis écrit son résultat partiel (somme et maximum) dans results[index]. Les lignes de halo des
+    bandes voisines sont lues directement dans U en mémoire partagée.
+    """
+    rows, cols = shape
+    blocks = [
+        _attach(names["grid"], shape, np.int8),
+        _attach(names["U"], (2, rows, cols), np.float64),
+        _attach(names["policy"], shape, np.int8),
+        _attach(names["results"], (num_workers, 2), np.float64),
+        _attach(names["control"], (3,), np.float64),
+    ]
+    grid, U, policy, results, control = (array for _, array in blocks)
+
+    lo, hi = max(start - 1, 0), min(stop + 1, rows)
+    cells = np.array(grid[lo:hi])
+    band_cells = cells[start - lo:stop - lo]
+    active = (band_cells != WALL) & (band_cells != GOAL) & (band_cells != GHOST)
+
+    try:
+        while True:
+            barrier.wait()
+            command, current, gamma = int(control[0]), int(control[1]), control[2]
+            if command == STOP:
+                break
+
+            U_block = U[current, lo:hi]
+            Q = band_q_values(cells, U_block, start - lo, stop - lo, gamma)
+            if command == SWEEP:
+                old = U_block[start - lo:stop - lo]
+                new = np.where(active, Q.max(axis=0), old)
+                U[1 - current, start:stop] = new
+                diff = np.abs(new - old)[active]
+                results[index] = diff.sum(), diff.max(initial=0.0)
+            else:
+                # Même règle que l'amélioration séquentielle : on ne change d'action
+                # que si la meilleure dépasse l'actuelle de plus de 1e-8.
+                current_actions = policy[start:stop].astype(np.int64)
+                q_current = np.take_along_axis(Q, current_actions[None], axis=0)[0]
+                changed = active & (Q.max(axis=0) > q_current + 1e-8)
+                policy[start:stop] = np.where(changed, Q.argmax(axis=0), current_actions)
+                results[index] = changed.sum(), 0.0
+            barrier.wait()
+    except BaseException:
+        barrier.abort()
+        raise
+
+class ParallelSweeper:
+    """
+    Balayages de Bellman répartis sur plusieurs processus. La grille est découpée
+    en bandes horizontales, une par worker ; la grille, U (deux tampons alternés),
+    la politique et les résultats partiels vivent en mémoire partagée. Comme les
+    transitions n'atteignent que les 4 voisins, un worker ne lit hors de sa bande
+    que la ligne de bord de chaque voisin. Chaque balayage se réduit à deux
+    rendez-vous (barrière) et à la somme des résultats partiels.
+    S'utilise comme gestionnaire de contexte pour libérer les processus et la mémoire.
+    """
+
+    def __init__(self, grid, workers=None):
+        cells = np.asarray(grid, dtype=np.int8)
+        self.rows, self.cols = cells.shape
+        self.workers = max(1, min(workers or os.cpu_count(), self.rows))
+        shape = (self.rows, self.cols)
+
+        self._blocks = {}
+        self._arrays = {}
+        specs = {
+            "grid": (shape, np.int8),
+            "U": ((2,) + shape, np.float64),
+            "policy": (shape, np.int8),
+            "results": ((self.workers, 2), np.float64),
+            "control": ((3,), np.float64),
+        }
+        for key, (block_shape, dtype) in specs.items():
+            size = max(1, int(np.prod(block_shape)) * np.dtype(dtype).itemsize)
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            self._blocks[key] = shm
+            self._arrays[key] = np.ndarray(block_shape, dtype=dtype, buffer=shm.buf)
+            self._arrays[key][...] = 0
+        self._arrays["grid"][...] = cells
+        self._current = 0
+
+        names = {key: shm.name for key, shm in self._blocks.items()}
+        bounds = np.linspace(0, self.rows, self.workers + 1).astype(int)
+        self._barrier = mp.Barrier(self.workers + 1)
+        self._processes = [
+            mp.Process(target=_band_worker,
+                       args=(names, shape, self.workers, i, bounds[i], bounds[i + 1], self._barrier), daemon=True)
+            for i in range(self.workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+    def _run(self, command, gamma=0.0):
+        """
+        Lance une commande sur toutes les bandes, attend qu'elles aient fini et renvoie
+        la somme et le maximum des résultats partiels.
+        """
+        control = self._arrays["control"]
+        control[:] = (command, self._current, gamma)
+        self._barrier.wait()
+        if command != STOP:
+            self._barrier.wait()
+        results = self._arrays["results"]
+        return float(results[:, 0].sum()), float(results[:, 1].max())
+
+    @property
+    def U(self):
+        """Utilités courantes (lignes x colonnes), dans la mémoire partagée."""
+        return self._arrays["U"][self._current]
+
+    def set_utilities(self, U):
+        self.U[...] = np.asarray(U).reshape(self.rows, self.cols)
+
+    def sweep(self, gamma):
+        """Un balayage de Bellman synchrone ; renvoie la somme et le maximum des |U'(s) - U(s)| des états actifs."""
+        sum_diff, max_diff = self._run(SWEEP, gamma)
+        self._current = 1 - self._current
+        return sum_diff, max_diff
+
+    def improve(self, actions, gamma):
+        """
+        Étape d'amélioration de la politique à partir des utilités courantes.
+        actions donne l'action (indice) actuelle de chaque état ; renvoie les
+        nouvelles actions (tableau plat) et le nombre d'états qui ont changé.
+        """
+        policy = self._arrays["policy"]
+        policy[...] = np.asarray(actions).reshape(self.rows, self.cols)
+        changed = int(self._run(IMPROVE, gamma)[0])
+        return policy.ravel().astype(np.int64), changed
+
+    def close(self):
+        if self._processes is None:
+            return
+        try:
+            self._run(STOP)
+        except Exception:
+            pass
+        for process in self._processes:
+            process.join()
+        self._processes = None
+        # Les vues numpy doivent disparaître avant de fermer les blocs partagés.
+        self._arrays = None
+        for shm in self._blocks.values():
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def run_value_iteration_parallel(model, gamma, tolerance, log, workers=None, callback=None):
+    """
+    Itération de la valeur synchrone dont chaque balayage est réparti par bandes
+    de lignes sur workers processus (un par cœur par défaut). Mêmes itérations et
+    même trace et mêmes mesures que run_value_iteration_numpy. Renvoie U, la meilleure action
+    (indice) de chaque état et le nombre d'itérations.
+    """
+    with ParallelSweeper(model.grid, workers) as sweeper:
+        iteration = 1
+        while True:
+            if callback is not None:
+                start_time = time.perf_counter()
+            sum_diff, max_diff = sweeper.sweep(gamma)
+            if callback is not None:
+                callback("iteration", iteration=iteration, residual_sum=sum_diff, residual_max=max_diff,
+                         time=time.perf_counter() - start_time)
+            if log.summary:
+                log.write(f"Itération {iteration} : Somme des differences |Us - U'(S)| = {sum_diff:.6f}\n")
+
+            if sum_diff < tolerance:
+                log.write(f"\nDifference < {tolerance} . Arret des itérations\n\n")
+                break
+            iteration += 1
+
+        U = sweeper.U.ravel().copy()
+
+    Q = model.q_values(U, gamma)
+    log.write(f"Nombre d'itérations : {iteration}\n")
+    log.write(f"Nombre de mises à jour de Bellman : {iteration * int(model.valid_mask.sum())}\n\n")
+    return U, Q.argmax(axis=1), iteration
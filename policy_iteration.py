@@ -1,58 +1,60 @@
+import math
+import time
+
 import numpy as np
 
-ACTIONS = ['haut', 'bas', 'gauche', 'droite']
+try:
+    from scipy import sparse
+    from scipy.sparse.linalg import spsolve
+except ImportError:
+    sparse = None
+
+from grid_config import POSITIONAL_PARAMS, load_config, load_model, solver_params
+from metrics import open_metrics, report_phase
+from parallel_sweeps import ParallelSweeper
+from policy_store import save_policy
+from trace_log import TraceWriter
 
 FULL_ACTION = {
     'haut': '^ up',
     'bas': 'v down',
     'gauche': '< left',
-    'droite': '> right'
+    'droite': '> right',
+    'haut-droite': '↗ up-right',
+    'bas-droite': '↘ down-right',
+    'bas-gauche': '↙ down-left',
+    'haut-gauche': '↖ up-left'
+}
+
+# Politique initiale de la grille d'exemple 3x4.
+INITIAL_POLICY_MAP = {
+    0: 'haut', 1: 'gauche', 2: 'bas', 
+    4: 'bas', 6: 'bas', 
+    8: 'gauche', 9: 'haut', 10: 'droite', 11: 'haut'
 }
 
 SHORT_ACTION = {
     'haut': '^',
     'bas': 'v',
     'gauche': '<',
-    'droite': '>'
+    'droite': '>',
+    'haut-droite': '↗',
+    'bas-droite': '↘',
+    'bas-gauche': '↙',
+    'haut-gauche': '↖'
 }
 
-def get_orthogonal_actions(action):
-    if action in ['haut', 'bas']:
-        return ['gauche', 'droite']
-    else:
-        return ['haut', 'bas']
+def merged_transitions(model, s, a):
+    """Regroupe les issues de (s, a) qui mènent au même état (rebonds) : {état suivant: probabilité}."""
+    transitions = {}
+    for next_s, prob in zip(model.next_states[s, a].tolist(), model.probs[s, a].tolist()):
+        transitions[next_s] = transitions.get(next_s, 0.0) + prob
+    return transitions
 
-def apply_move(state, action, grid, rows, cols):
-    r = state // cols
-    c = state % cols
-    
-    nr, nc = r, c
-    if action == 'haut': nr -= 1
-    elif action == 'bas': nr += 1
-    elif action == 'gauche': nc -= 1
-    elif action == 'droite': nc += 1
-        
-    if nr < 0 or nr >= rows or nc < 0 or nc >= cols:
-        return state
-    
-    next_state = nr * cols + nc
-    if grid[nr][nc] == 3:
-        return state
-        
-    return next_state
-
-def get_reward(state, grid, cols):
-    r = state // cols
-    c = state % cols
-    cell = grid[r][c]
-    
-    if cell == 1:   return 1.0
-    elif cell == 2: return -1.0
-    else:           return -0.04
-
-def evaluate_policy(policy, grid, rows, cols, gamma, valid_states):
+def evaluate_policy(policy, model, gamma, valid_states):
     N = len(valid_states)
     state_to_idx = {s: i for i, s in enumerate(valid_states)}
+    rewards = model.state_rewards.tolist()
     
     A = np.zeros((N, N))
     b = np.zeros(N)
@@ -61,21 +63,12 @@ def evaluate_policy(policy, grid, rows, cols, gamma, valid_states):
         i = state_to_idx[s]
         A[i, i] = 1.0
         
-        action = policy[s]
-        intended_next = apply_move(s, action, grid, rows, cols)
-        orth_actions = get_orthogonal_actions(action)
-        orth1_next = apply_move(s, orth_actions[0], grid, rows, cols)
-        orth2_next = apply_move(s, orth_actions[1], grid, rows, cols)
-        
-        transitions = {}
-        transitions[intended_next] = transitions.get(intended_next, 0.0) + 0.8
-        transitions[orth1_next] = transitions.get(orth1_next, 0.0) + 0.1
-        transitions[orth2_next] = transitions.get(orth2_next, 0.0) + 0.1
+        transitions = merged_transitions(model, s, model.action_index[policy[s]])
         
         expected_reward = 0.0
         for next_s, prob in transitions.items():
-            expected_reward += prob * get_reward(next_s, grid, cols)
-            if next_s in valid_states:
+            expected_reward += prob * rewards[next_s]
+            if next_s in state_to_idx:
                 j = state_to_idx[next_s]
                 A[i, j] -= gamma * prob
                 
@@ -85,6 +78,157 @@ def evaluate_policy(policy, grid, rows, cols, gamma, valid_states):
     U = {s: U_values[state_to_idx[s]] for s in valid_states}
     return U
 
+def policy_arrays(policy, model, valid_states):
+    """
+    Vectorise la politique sur les états valides : renvoie les états suivants (N, issues),
+    leurs probabilités (N, issues) et la récompense espérée b (N,) de chaque état.
+    """
+    states = np.asarray(valid_states, dtype=np.int64)
+    actions = np.array([model.action_index[policy[s]] for s in valid_states], dtype=np.int64)
+    next_states = model.next_states[states, actions]
+    probs = model.probs[states, actions]
+    b = (probs * model.rewards[states, actions]).sum(axis=1)
+    return next_states, probs, b
+
+class PolicySystem:
+    """
+    Mêmes tableaux que policy_arrays (next_states, probs, b), tenus à jour d'une
+    itération à l'autre : update ne recalcule que les lignes des états dont l'action
+    a changé (voir improve_policy) au lieu de reparcourir toute la politique.
+    """
+
+    def __init__(self, model, actions, valid_states):
+        self.model = model
+        self.states = np.asarray(valid_states, dtype=np.int64)
+        self.rows = np.full(model.num_states, -1, dtype=np.int64)
+        self.rows[self.states] = np.arange(len(self.states))
+        self.next_states = np.empty((len(self.states), model.next_states.shape[2]), dtype=model.next_states.dtype)
+        self.probs = np.empty(self.next_states.shape)
+        self.b = np.empty(len(self.states))
+        self.update(self.states, actions)
+
+    def update(self, changed, actions):
+        """Recalcule les lignes des états changed, actions donnant l'action (indice) de chaque état."""
+        changed = np.asarray(changed, dtype=np.int64)
+        rows = self.rows[changed]
+        chosen = np.asarray(actions)[changed]
+        self.next_states[rows] = self.model.next_states[changed, chosen]
+        self.probs[rows] = self.model.probs[changed, chosen]
+        self.b[rows] = (self.probs[rows] * self.model.rewards[changed, chosen]).sum(axis=1)
+
+    def arrays(self):
+        return self.next_states, self.probs, self.b
+
+def improve_policy(model, U, actions, gamma, tolerance=1e-8):
+    """
+    Étape d'amélioration en une opération : Q = R + γ·P·U pour toutes les paires
+    (état, action) (model.q_values), puis argmax. Comme dans la boucle de la trace
+    complète, un état ne change d'action que si la meilleure dépasse l'actuelle de
+    plus de tolerance. U et actions couvrent tous les états (U nul hors des états valides).
+    Renvoie les nouvelles actions et les indices des états dont l'action a changé.
+    """
+    Q = model.q_values(U, gamma)
+    q_current = np.take_along_axis(Q, actions[:, None], axis=1)[:, 0]
+    changed = np.flatnonzero(model.valid_mask & (Q.max(axis=1) > q_current + tolerance))
+    improved = actions.copy()
+    improved[changed] = Q[changed].argmax(axis=1)
+    return improved, changed
+
+def build_sparse_system(policy, model, gamma, valid_states, system=None):
+    """
+    Construit le système (I - γP) U = b au format CSR : au plus 3 non-zéros hors
+    diagonale par ligne. system (un PolicySystem à jour) évite de reconstruire les
+    tableaux de la politique.
+    """
+    N = len(valid_states)
+    next_states, probs, b = policy_arrays(policy, model, valid_states) if system is None else system.arrays()
+
+    state_to_idx = np.full(model.num_states, -1, dtype=np.int64)
+    state_to_idx[valid_states] = np.arange(N)
+    cols = state_to_idx[next_states]
+    keep = cols >= 0
+
+    rows = np.repeat(np.arange(N), next_states.shape[1])[keep.ravel()]
+    P = sparse.coo_matrix((probs[keep], (rows, cols[keep])), shape=(N, N)).tocsr()
+    A = (sparse.identity(N, format='csr') - gamma * P).tocsr()
+    return A, b
+
+def gauss_seidel_evaluation(policy, model, gamma, valid_states, U0=None, tol=1e-10, max_sweeps=100000, system=None):
+    """
+    Évaluation itérative par Gauss-Seidel par couleurs, sans matrice : les cases
+    d'une même couleur sont mises à jour en une opération. Si chaque déplacement de
+    model.moves change la parité de ligne + colonne (dynamique d'origine), le damier
+    rouge-noir suffit ; sinon (diagonales) on colore par (ligne % 2, colonne % 2).
+    Une dynamique dont un déplacement garde ces deux parités relie des cases de même
+    couleur, dont la mise à jour devient alors un pas de Jacobi.
+    U0 permet un départ à chaud. Après max_sweeps balayages sans convergence, un
+    avertissement est affiché et les utilités approchées sont renvoyées.
+    """
+    states = np.asarray(valid_states, dtype=np.int64)
+    next_states, probs, b = policy_arrays(policy, model, valid_states) if system is None else system.arrays()
+
+    # Les rebonds sur place passent dans la diagonale.
+    self_loop = next_states == states[:, None]
+    diag = 1.0 - gamma * (probs * self_loop).sum(axis=1)
+    off_probs = np.where(self_loop, 0.0, probs)
+
+    U_full = np.zeros(model.num_states)
+    if U0 is not None:
+        U_full[states] = U0
+
+    r, c = states // model.cols, states % model.cols
+    if all((dr + dc) % 2 for dr, dc in model.moves):
+        color = (r + c) % 2
+    else:
+        color = 2 * (r % 2) + c % 2
+    colors = [np.flatnonzero(color == k) for k in range(color.max(initial=0) + 1)]
+
+    max_change = math.inf
+    for _ in range(max_sweeps):
+        max_change = 0.0
+        for idx in colors:
+            new_values = (b[idx] + gamma * (off_probs[idx] * U_full[next_states[idx]]).sum(axis=1)) / diag[idx]
+            if len(idx):
+                max_change = max(max_change, np.abs(new_values - U_full[states[idx]]).max())
+            U_full[states[idx]] = new_values
+        if max_change < tol:
+            break
+    else:
+        print(f"Avertissement : Gauss-Seidel n'a pas convergé en {max_sweeps} balayages "
+              f"(dernier écart {max_change:.3g} > {tol}), utilités approchées.")
+
+    return U_full[states]
+
+def evaluate_policy_sparse(policy, model, gamma, valid_states, U0=None, iterative=False, system=None):
+    """
+    Évaluation de la politique sans matrice dense : résolution directe creuse avec
+    scipy si disponible, sinon (ou si iterative=True) Gauss-Seidel rouge-noir
+    démarré depuis U0. system : voir build_sparse_system.
+    """
+    if sparse is not None and not iterative:
+        A, b = build_sparse_system(policy, model, gamma, valid_states, system)
+        U_values = spsolve(A.tocsc(), b)
+    else:
+        U_values = gauss_seidel_evaluation(policy, model, gamma, valid_states, U0, system=system)
+    return dict(zip(valid_states, U_values))
+
+def evaluate_policy_sweeps(policy, model, gamma, valid_states, U0=None, k=1, system=None):
+    """
+    Évaluation partielle (itération de la politique modifiée) : k balayages vectorisés
+    de l'équation de Bellman pour la politique, démarrés depuis U0.
+    """
+    states = np.asarray(valid_states, dtype=np.int64)
+    next_states, probs, b = policy_arrays(policy, model, valid_states) if system is None else system.arrays()
+
+    U_full = np.zeros(model.num_states)
+    if U0 is not None:
+        U_full[states] = U0
+
+    for _ in range(k):
+        U_full[states] = b + gamma * (probs * U_full[next_states]).sum(axis=1)
+
+    return dict(zip(valid_states, U_full[states]))
+
 def print_visualisation(grid, policy, rows, cols, log):
     log.write("---Visualisation---\n\n")
     for r in range(rows):
@@ -98,124 +242,233 @@ def print_visualisation(grid, policy, rows, cols, log):
             elif grid[r][c] == 2:
                 row_symbols.append("F") 
             else:
-                row_symbols.append(SHORT_ACTION[policy[s]])
+                row_symbols.append(SHORT_ACTION.get(policy[s], policy[s]))
         log.write("[" + ", ".join(row_symbols) + "]\n")
     log.write("\n")
 
-def solve_policy_iteration(input_filename="policy-iteration.txt", output_filename="log-file_PI.txt"):
-    try:
-        with open(input_filename, 'r') as f:
-            lines = [line.strip() for line in f if line.strip()]
-    except FileNotFoundError:
-        print(f"Erreur : Le fichier {input_filename} est introuvable.")
-        return
-
-    grid = []
-    gamma = 0.0
-    for line in lines:
-        if ',' in line:
-            grid.append([int(x) for x in line.split(',')])
-        elif gamma == 0.0:
-            gamma = float(line)
-            
-    rows = len(grid)
-    cols = len(grid[0])
-    num_states = rows * cols
+def run_policy_iteration(model, gamma, log, evaluation="dense", evaluation_sweeps=None, initial_policy=None,
+                         workers=None, callback=None):
+    """
+    Résout le modèle par itération de la politique en écrivant la trace dans log.
+    initial_policy associe une action (nom) à certains états ; les autres partent de la
+    première action du modèle ('haut' avec la dynamique d'origine). Les actions sans
+    symbole connu sont écrites sous leur nom dans la trace.
+    Hors trace "full", l'amélioration est calculée en une opération (improve_policy).
+    workers (trace "summary" ou "off" seulement, ValueError sinon) répartit l'étape d'amélioration par bandes de lignes
+    sur autant de processus (voir ParallelSweeper). callback (voir metrics.MetricsWriter)
+    reçoit à chaque itération le nombre de changements de politique, l'écart entre deux
+    évaluations successives et la durée des phases "evaluation" et "improvement".
+    Renvoie U, l'action (indice) de chaque état et le nombre d'itérations.
+    """
+    if workers is not None and log.full:
+        raise ValueError("workers n'écrit pas la trace complète : utiliser trace=\"summary\" ou \"off\"")
+    if workers is not None and model.dynamics is not None:
+        raise ValueError("workers ne prend en charge que la dynamique d'origine")
+    grid = model.grid
+    rows, cols = model.rows, model.cols
+    rewards = model.state_rewards.tolist()
     
-    walls = [i for i in range(num_states) if grid[i // cols][i % cols] == 3]
-    terminals = [i for i in range(num_states) if grid[i // cols][i % cols] in [1, 2]]
-    valid_states = [i for i in range(num_states) if i not in walls and i not in terminals]
+    valid_states = np.flatnonzero(model.valid_mask).tolist()
+    is_valid = model.valid_mask.tolist()
     
-    initial_policy_map = {
-        0: 'haut', 1: 'gauche', 2: 'bas', 
-        4: 'bas', 6: 'bas', 
-        8: 'gauche', 9: 'haut', 10: 'droite', 11: 'haut'
-    }
-    policy = {s: initial_policy_map.get(s, 'haut') for s in valid_states}
+    if initial_policy is None:
+        # La politique d'exemple n'a de sens que si la dynamique a les mêmes noms d'actions.
+        initial_policy = INITIAL_POLICY_MAP if set(INITIAL_POLICY_MAP.values()) <= model.action_index.keys() else {}
+    policy = {s: initial_policy.get(s, model.actions[0]) for s in valid_states}
     
-    with open(output_filename, 'w', encoding='utf-8') as log:
-        log.write("--Initiation de la politique---\n\n")
+    log.write("--Initiation de la politique---\n\n")
+    if log.full:
         for r in range(rows):
             for c in range(cols):
                 s = r * cols + c
-                if s in valid_states:
-                    log.write(f"Grid_{r}_{c} -> {FULL_ACTION[policy[s]]} a été choisie initialement\n")
+                if is_valid[s]:
+                    log.write(f"Grid_{r}_{c} -> {FULL_ACTION.get(policy[s], policy[s])} a été choisie initialement\n")
         log.write("\n")
         
+    if log.summary:
         print_visualisation(grid, policy, rows, cols, log)
         
-        iteration = 0
-        while True:
-            log.write(f"--- Itération {iteration} ---\n\n")
+    sweeper = ParallelSweeper(grid, workers) if workers is not None else None
+    actions = np.zeros(model.num_states, dtype=np.int64)
+    actions[valid_states] = [model.action_index[policy[s]] for s in valid_states]
+    # Hors résolution dense, les tableaux de la politique ne sont mis à jour que pour les états changés.
+    system = PolicySystem(model, actions, valid_states) if evaluation != "dense" or evaluation_sweeps is not None else None
+
+    iteration = 0
+    U_prev = None
+    partial_evaluation = evaluation_sweeps is not None and evaluation_sweeps != math.inf
+    # En mode modifié, une politique stable n'est acceptée qu'après une évaluation exacte.
+    exact_check = False
+    while True:
+        log.write(f"--- Itération {iteration} ---\n\n")
+        start_time = time.perf_counter()
+        if partial_evaluation and not exact_check:
+            log.write(f"---Evaluation de la politique ({evaluation_sweeps} balayages de Bellman)---\n\n")
+            U = evaluate_policy_sweeps(policy, model, gamma, valid_states, U0=U_prev, k=evaluation_sweeps,
+                                       system=system)
+        elif evaluation == "dense":
             log.write("---Evaluation de la politique (Résolution exacte par système d'équations)---\n\n")
+            U = evaluate_policy(policy, model, gamma, valid_states)
+        else:
+            log.write("---Evaluation de la politique (Résolution par système creux)---\n\n")
+            U = evaluate_policy_sparse(policy, model, gamma, valid_states, U0=U_prev,
+                                       iterative=(evaluation == "gauss-seidel"), system=system)
+        U_evaluated = np.array([U[s] for s in valid_states])
+        if callback is not None:
+            diff = np.abs(U_evaluated - (U_prev if U_prev is not None else 0.0))
+        U_prev = U_evaluated
+        evaluation_time = time.perf_counter() - start_time
+        report_phase(callback, "evaluation", start_time)
             
-            U = evaluate_policy(policy, grid, rows, cols, gamma, valid_states)
-            
-            def get_U(state):
-                return U[state] if state in valid_states else 0.0
+        def get_U(state):
+            return U[state] if is_valid[state] else 0.0
 
+        if log.full:
             for r in range(rows):
                 for c in range(cols):
                     s = r * cols + c
-                    if s in valid_states:
-                        log.write(f"Grid_{r}_{c} (-> {FULL_ACTION[policy[s]]}): {U[s]}\n")
-            
-            log.write("\n---Amélioration de la politique---\n\n")
-            policy_changed = False
-            new_policy = {}
+                    if is_valid[s]:
+                        log.write(f"Grid_{r}_{c} (-> {FULL_ACTION.get(policy[s], policy[s])}): {U[s]}\n")
             
+        log.write("\n---Amélioration de la politique---\n\n")
+        start_time = time.perf_counter()
+        policy_changed = False
+        num_changed = 0
+        new_policy = {}
+
+        if not log.full:
+            U_full = np.zeros(model.num_states)
+            U_full[valid_states] = U_prev
+            if sweeper is not None:
+                sweeper.set_utilities(U_full)
+                improved, _ = sweeper.improve(actions, gamma)
+                changed = np.flatnonzero(improved != actions)
+            else:
+                improved, changed = improve_policy(model, U_full, actions, gamma)
+            new_policy = policy
+            for s, a in zip(changed.tolist(), improved[changed].tolist()):
+                new_policy[s] = model.actions[a]
+            num_changed = len(changed)
+            policy_changed = num_changed > 0
+        else:
+            changed = []
             for r in range(rows):
                 for c in range(cols):
                     s = r * cols + c
-                    if s in valid_states:
+                    if is_valid[s]:
                         log.write(f"    Grid_{r}_{c}:\n")
                         q_values = {}
                         
-                        for action in ACTIONS:
-                            intended_next = apply_move(s, action, grid, rows, cols)
-                            orth_actions = get_orthogonal_actions(action)
-                            orth1_next = apply_move(s, orth_actions[0], grid, rows, cols)
-                            orth2_next = apply_move(s, orth_actions[1], grid, rows, cols)
-                            
-                            transitions = {}
-                            transitions[intended_next] = transitions.get(intended_next, 0.0) + 0.8
-                            transitions[orth1_next] = transitions.get(orth1_next, 0.0) + 0.1
-                            transitions[orth2_next] = transitions.get(orth2_next, 0.0) + 0.1
+                        for a, action in enumerate(model.actions):
+                            transitions = merged_transitions(model, s, a)
                             
                             q_total = 0.0
                             for next_s, prob in transitions.items():
-                                r_val = get_reward(next_s, grid, cols)
+                                r_val = rewards[next_s]
                                 q_total += prob * (r_val + gamma * get_U(next_s))
                                 
                             q_values[action] = q_total
                         
                         current_action = policy[s]
-                        log.write(f"Actuelle (-> {FULL_ACTION[current_action]}) : {q_values[current_action]}\n")
+                        log.write(f"Actuelle (-> {FULL_ACTION.get(current_action, current_action)}) : {q_values[current_action]}\n")
                         
-                        for action in ACTIONS:
+                        for action in model.actions:
                             if action != current_action:
-                                log.write(f"-> {FULL_ACTION[action]} : {q_values[action]}\n")
+                                log.write(f"-> {FULL_ACTION.get(action, action)} : {q_values[action]}\n")
                                 
                         best_action = max(q_values, key=q_values.get)
                         
                         if q_values[best_action] > q_values[current_action] + 1e-8:
                             new_policy[s] = best_action
                             policy_changed = True
-                            log.write(f"\n Changement de politique : Grid_{r}_{c} -> {FULL_ACTION[best_action]}\n\n")
+                            num_changed += 1
+                            changed.append(s)
+                            log.write(f"\n Changement de politique : Grid_{r}_{c} -> {FULL_ACTION.get(best_action, best_action)}\n\n")
                         else:
                             new_policy[s] = current_action
-                            log.write(f"\n Politique : Grid_{r}_{c} -> {FULL_ACTION[current_action]}\n\n")
+                            log.write(f"\n Politique : Grid_{r}_{c} -> {FULL_ACTION.get(current_action, current_action)}\n\n")
 
-            policy = new_policy
+            improved = actions.copy()
+            improved[changed] = [model.action_index[new_policy[s]] for s in changed]
+
+        policy = new_policy
+        if system is not None and num_changed:
+            system.update(changed, improved)
+        actions = improved
+        improvement_time = time.perf_counter() - start_time
+        if callback is not None:
+            report_phase(callback, "improvement", start_time)
+            callback("iteration", iteration=iteration, policy_changes=num_changed, residual_sum=float(diff.sum()),
+                     residual_max=float(diff.max(initial=0.0)), time=evaluation_time + improvement_time)
             
+        if log.summary:
             print_visualisation(grid, policy, rows, cols, log)
             
-            if not policy_changed:
-                log.write("Pas de Changement : Fin de l'algorithme\n")
-                log.write(f"Nombre d'itérations finales : {iteration}\n")
-                break
+        if evaluation_sweeps is not None:
+            log.write(f"Temps d'évaluation : {evaluation_time:.6f} s\n")
+            log.write(f"Temps d'amélioration : {improvement_time:.6f} s\n\n")
+            
+        if not policy_changed:
+            if partial_evaluation and not exact_check:
+                log.write("Pas de Changement : vérification par une évaluation exacte\n\n")
+                exact_check = True
+                iteration += 1
+                continue
+            log.write("Pas de Changement : Fin de l'algorithme\n")
+            log.write(f"Nombre d'itérations finales : {iteration}\n")
+            break
                 
-            iteration += 1
+        exact_check = False
+        iteration += 1
+
+    if sweeper is not None:
+        sweeper.close()
+
+    U_values = np.zeros(model.num_states)
+    U_values[valid_states] = U_prev
+    return U_values, actions, iteration
+
+def solve_policy_iteration(input_filename="policy-iteration.txt", output_filename="log-file_PI.txt", evaluation="dense",
+                           evaluation_sweeps=None, trace="full", compress=False, workers=None,
+                           cache_dir=None, metrics=None, export=None, dynamics=None, gamma=None):
+    """
+    Résout la grille par itération de la politique.
+    evaluation="dense" résout le système complet N×N (petites grilles),
+    evaluation="sparse" le résout au format creux, evaluation="gauss-seidel" l'approche
+    par Gauss-Seidel démarré depuis les utilités de l'itération précédente.
+    evaluation_sweeps=k active l'itération de la politique modifiée : chaque évaluation
+    se limite à k balayages de Bellman démarrés depuis les utilités précédentes
+    (math.inf revient à la résolution exacte) et la trace indique les temps de calcul.
+    trace="full" | "summary" | "off" règle le détail de la trace (voir TraceWriter),
+    compress=True l'écrit en gzip. workers parallélise l'étape d'amélioration
+    (trace "summary" ou "off", ValueError avec la trace "full"). input_filename est lu par grid_config.load_config ;
+    cache_dir garde le modèle compilé sur disque. metrics (fichier .csv / .jsonl ou
+    callback) reçoit les mesures de chaque itération. export enregistre la politique et
+    U dans un fichier binaire (voir policy_store). dynamics remplace la dynamique
+    d'origine (voir dynamics.Dynamics.from_spec). gamma remplace la valeur du fichier
+    (obligatoire avec une grille .npy ; ValueError s'il manque).
+    Renvoie U et l'action (indice) de chaque état.
+    """
+    try:
+        grid, params = load_config(input_filename, POSITIONAL_PARAMS["policy_iteration"])
+    except FileNotFoundError:
+        print(f"Erreur : Le fichier {input_filename} est introuvable.")
+        return
+
+    gamma, = solver_params(params, "policy_iteration", input_filename, gamma=gamma)
+    callback, writer = open_metrics(metrics, "policy_iteration")
+    start_time = time.perf_counter()
+    model = load_model(grid, cache_dir, dynamics)
+    report_phase(callback, "model_build", start_time)
+
+    with TraceWriter(output_filename, trace, compress) as log:
+        U, actions, _ = run_policy_iteration(model, gamma, log, evaluation, evaluation_sweeps, workers=workers,
+                                             callback=callback)
+    if writer is not None:
+        writer.close()
+    if export is not None:
+        save_policy(export, model, actions, U, gamma)
+    return U, actions
 
 if __name__ == "__main__":
     solve_policy_iteration()
\ No newline at end of file
@@ -0,0 +1,94 @@
+import struct
+
+import numpy as np
+
+# En-tête : signature, version, lignes, colonnes, gamma, présence de Q, nombre
+# d'actions, taille (octets) des noms d'actions écrits juste après l'en-tête.
+HEADER = struct.Struct("<8sHIIdBHI")
+MAGIC = b"GRIDPOL\0"
+VERSION = 2
+# Les tableaux commencent à des positions multiples de ALIGNMENT octets.
+ALIGNMENT = 64
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def _layout(num_states, names_size, q_columns):
+    """
+    Positions (octets) des actions, des utilités et de Q dans le fichier, puis sa
+    taille (q_columns vaut 0 sans Q).
+    """
+    actions_offset = _aligned(HEADER.size + names_size)
+    utilities_offset = _aligned(actions_offset + num_states)
+    q_offset = _aligned(utilities_offset + 4 * num_states)
+    end = q_offset + 4 * q_columns * num_states
+    return actions_offset, utilities_offset, q_offset, end
+
+def save_policy(filename, model, best_actions, U, gamma, Q=None):
+    """
+    Enregistre une solution dans un fichier binaire compact : en-tête (forme de la
+    grille, gamma, nombre et noms des actions du modèle), action de chaque état en
+    int8 (-1 pour les murs et les terminaux), utilités en float32 et, si Q est
+    fourni (Q-learning), la table Q en float32.
+    """
+    num_states = model.num_states
+    num_actions = len(model.actions)
+    names = "\n".join(model.actions).encode("utf-8")
+    actions = np.where(model.valid_mask, np.asarray(best_actions), -1).astype(np.int8)
+    actions_offset, utilities_offset, q_offset, end = _layout(num_states, len(names),
+                                                              0 if Q is None else num_actions)
+
+    with open(filename, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, model.rows, model.cols, gamma, Q is not None, num_actions, len(names)))
+        f.write(names)
+        f.seek(actions_offset)
+        f.write(actions.tobytes())
+        f.seek(utilities_offset)
+        f.write(np.asarray(U, dtype=np.float32).tobytes())
+        if Q is not None:
+            f.seek(q_offset)
+            f.write(np.asarray(Q, dtype=np.float32).tobytes())
+        f.truncate(end)
+
+class PolicyStore:
+    """
+    Solution enregistrée par save_policy, ouverte en memmap lecture seule : seul
+    l'en-tête est lu à l'ouverture, les pages des tableaux ne sont chargées qu'au
+    premier accès, et action(s) / utility(s) coûtent un accès mémoire.
+    action_names donne le nom de chaque indice d'action (dynamique du modèle résolu).
+    """
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as f:
+            header = f.read(HEADER.size)
+            magic, version = struct.unpack_from("<8sH", header)
+            if magic != MAGIC:
+                raise ValueError(f"{filename} n'est pas un fichier de politique")
+            if version != VERSION:
+                raise ValueError(f"Version de fichier de politique non prise en charge : {version}")
+            _, _, rows, cols, gamma, has_q, num_actions, names_size = HEADER.unpack(header)
+            self.action_names = f.read(names_size).decode("utf-8").split("\n")
+
+        self.rows, self.cols, self.gamma = rows, cols, gamma
+        self.num_states = rows * cols
+        self.num_actions = num_actions
+        actions_offset, utilities_offset, q_offset, _ = _layout(self.num_states, names_size,
+                                                                num_actions if has_q else 0)
+        self.actions = np.memmap(filename, dtype=np.int8, mode='r', offset=actions_offset,
+                                 shape=(self.num_states,))
+        self.utilities = np.memmap(filename, dtype=np.float32, mode='r', offset=utilities_offset,
+                                   shape=(self.num_states,))
+        self.q_values = (np.memmap(filename, dtype=np.float32, mode='r', offset=q_offset,
+                                   shape=(self.num_states, num_actions)) if has_q else None)
+
+    def action(self, state):
+        """Indice (dans les actions du modèle) de l'action à jouer en state (-1 pour un mur ou un terminal)."""
+        return int(self.actions[state])
+
+    def action_name(self, state):
+        """Nom de l'action à jouer en state (None pour un mur ou un terminal)."""
+        action = self.action(state)
+        return self.action_names[action] if action >= 0 else None
+
+    def utility(self, state):
+        return float(self.utilities[state])
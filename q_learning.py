@@ -1,163 +1,486 @@
 import random
+import time
 
-ACTIONS = ['haut', 'bas', 'gauche', 'droite']
+import numpy as np
 
-def get_orthogonal_actions(action):
-    """Retourne les directions perpendiculaires pour la dérive stochastique."""
-    if action in ['haut', 'bas']:
-        return ['gauche', 'droite']
-    else:
-        return ['haut', 'bas']
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
-def simulate_environment(state, action, grid, rows, cols):
+from exploration import ConvergenceMonitor, Exploration
+from grid_config import POSITIONAL_PARAMS, load_config, load_model, solver_params
+from metrics import open_metrics, report_phase
+from policy_store import save_policy
+from replay_buffer import ReplayBuffer
+from simulator import GridSimulator
+from trace_log import TraceWriter
+
+def simulate_environment(state, action, model):
     """
     Simule l'environnement avec sa part d'incertitude.
-    Probabilités : 80% direction voulue, 10% dérive orthogonale 1, 10% dérive orthogonale 2.
+    Probabilités lues dans le modèle (par défaut 80% direction voulue, 10% pour chaque
+    dérive orthogonale). L'action est un indice dans model.actions ; les états
+    d'arrivée (rebonds inclus) sont lus dans le modèle compilé.
     """
     rand = random.random()
-    if rand < 0.8:
-        actual_action = action
-    elif rand < 0.9:
-        actual_action = get_orthogonal_actions(action)[0]
-    else:
-        actual_action = get_orthogonal_actions(action)[1]
-        
-    r = state // cols
-    c = state % cols
-    
-    nr, nc = r, c
-    if actual_action == 'haut': nr -= 1
-    elif actual_action == 'bas': nr += 1
-    elif actual_action == 'gauche': nc -= 1
-    elif actual_action == 'droite': nc += 1
-        
-    if nr < 0 or nr >= rows or nc < 0 or nc >= cols:
-        return state
-    
-    next_state = nr * cols + nc
-    if grid[nr][nc] == 3:
-        return state
-        
-    return next_state
+    probs = model.probs[state, action].tolist()
+    outcome = 0
+    cumulative = probs[0]
+    while outcome < len(probs) - 1 and probs[outcome + 1] > 0 and rand >= cumulative:
+        outcome += 1
+        cumulative += probs[outcome]
 
-def get_reward(state, grid, cols):
+    return int(model.next_states[state, action, outcome])
+
+def get_reward(state, model):
     """Renvoie la récompense associée à un état CIBLE."""
-    r = state // cols
-    c = state % cols
-    cell = grid[r][c]
-    
-    if cell == 1:   return 1.0
-    elif cell == 2: return -1.0
-    else:           return -0.04
+    return float(model.state_rewards[state])
 
-def is_terminal(state, grid, cols):
+def is_terminal(state, model):
     """Vérifie si la case est le but (1) ou le fantôme (2)."""
-    r = state // cols
-    c = state % cols
-    return grid[r][c] in [1, 2]
+    return bool(model.terminal_mask[state])
 
 def choose_action(state, Q):
-    """Sélectionne l'action gloutonne. S'il y a égalité parfaite, tranche aléatoirement."""
-    q_values = [Q[state][a] for a in ACTIONS]
+    """
+    Sélectionne l'action gloutonne (indice dans model.actions) dans la ligne Q[state].
+    S'il y a égalité parfaite, tranche aléatoirement.
+    """
+    q_values = Q[state].tolist()
     max_q = max(q_values)
-    best_actions = [a for a in ACTIONS if Q[state][a] == max_q]
+    best_actions = [a for a, q in enumerate(q_values) if q == max_q]
     return random.choice(best_actions), q_values
 
-def solve_q_learning(input_filename="Q-Learning.txt", output_filename="log-file_QL.txt"):
-    try:
-        with open(input_filename, 'r') as f:
-            lines = [line.strip() for line in f if line.strip()]
-    except FileNotFoundError:
-        print(f"Erreur : Le fichier {input_filename} est introuvable.")
-        return
+def q_learning_episodes(Q, next_states, thresholds, rewards, terminal, start_state,
+                        gamma, alpha, num_episodes, max_steps, seed):
+    """
+    Boucle d'apprentissage sans trace, écrite pour être compilée par numba.
+    Même règle que choose_action : action gloutonne, égalités départagées
+    uniformément (tirage par réservoir), mais avec le générateur de numba initialisé
+    par seed plutôt que le module random.
+    Renvoie Q et le nombre de mises à jour TD (une par pas).
+    """
+    np.random.seed(seed)
+    num_actions = Q.shape[1]
+    updates = 0
+    for episode in range(num_episodes):
+        s = start_state
+        step_count = 0
+        while not terminal[s] and step_count < max_steps:
+            step_count += 1
+            updates += 1
+
+            action = 0
+            best_q = Q[s, 0]
+            ties = 1
+            for a in range(1, num_actions):
+                if Q[s, a] > best_q:
+                    best_q = Q[s, a]
+                    action = a
+                    ties = 1
+                elif Q[s, a] == best_q:
+                    ties += 1
+                    if np.random.randint(ties) == 0:
+                        action = a
+
+            rand = np.random.random()
+            outcome = 0
+            while outcome < thresholds.shape[2] - 1 and rand >= thresholds[s, action, outcome]:
+                outcome += 1
+            next_state = next_states[s, action, outcome]
+
+            max_q_next = 0.0
+            if not terminal[next_state]:
+                max_q_next = Q[next_state].max()
+            q_old = Q[s, action]
+            Q[s, action] = q_old + alpha * (rewards[next_state] + gamma * max_q_next - q_old)
+            s = next_state
+    return Q, updates
+
+def run_batched_q_learning(model, gamma, alpha, num_episodes, start_state, max_steps,
+                           batch_size=256, seed=None, conflict="mean", callback=None, exploration=None,
+                           monitor=None):
+    """
+    Q-learning vectorisé : batch_size agents indépendants avancent en même temps.
+    À chaque pas, le GridSimulator tire l'issue de chaque agent et les mises à jour
+    TD sont appliquées par np.add.at. Quand
+    plusieurs agents mettent à jour la même paire (s, a), conflict="mean" applique
+    la moyenne de leurs erreurs TD, conflict="sum" leur somme.
+    Un agent qui termine son essai repart de start_state tant que num_episodes
+    essais n'ont pas été lancés. callback reçoit la longueur et le retour de chaque
+    essai, dans l'ordre où ils se terminent.
+    exploration (un exploration.Exploration, gloutonne par défaut) choisit les actions
+    et le pas d'apprentissage ; son paramètre suit le nombre d'essais terminés.
+    monitor (un exploration.ConvergenceMonitor) est consulté chaque fois que
+    batch_size essais de plus se sont terminés et arrête tous les agents dès que
+    l'apprentissage est stable.
+    Renvoie Q et le nombre de mises à jour TD (une par agent et par pas).
+    """
+    if conflict not in ("mean", "sum"):
+        raise ValueError(f"Règle de conflit inconnue : {conflict}")
+    rng = np.random.default_rng(seed)
+    num_actions = model.next_states.shape[1]
+    Q = np.zeros((model.num_states, num_actions))
+    Q_flat = Q.reshape(-1)
+    simulator = GridSimulator(model, rng)
+    if exploration is None:
+        exploration = Exploration(model.num_states, num_actions, seed=rng)
+
+    num_agents = min(batch_size, num_episodes)
+    states = np.full(num_agents, start_state, dtype=np.int64)
+    steps = np.zeros(num_agents, dtype=np.int64)
+    active = np.full(num_agents, not model.terminal_mask[start_state])
+    started = num_agents
+    finished = 0
+    updates = 0
+    if callback is not None:
+        returns = np.zeros(num_agents)
+        discounts = np.ones(num_agents)
+    if monitor is not None:
+        checked = 0
+        max_delta = 0.0
+
+    while active.any():
+        agents = np.flatnonzero(active)
+        s = states[agents]
+
+        q = Q[s]
+        exploration.set_episode(finished)
+        actions = exploration.select_batch(s, q)
+
+        next_s, rewards, done = simulator.step_batch(s, actions)
+
+        max_q_next = np.where(done, 0.0, Q[next_s].max(axis=1))
+        td_error = rewards + gamma * max_q_next - q[np.arange(len(agents)), actions]
+        step_size = exploration.visit(s, actions, alpha)
+        pairs = s * num_actions + actions
+        if conflict == "mean":
+            _, inverse, counts = np.unique(pairs, return_inverse=True, return_counts=True)
+            td_error = td_error / counts[inverse]
+        np.add.at(Q_flat, pairs, step_size * td_error)
+        updates += len(agents)
+        if monitor is not None:
+            max_delta = max(max_delta, float(np.abs(Q_flat[pairs] - q[np.arange(len(agents)), actions]).max()))
+
+        states[agents] = next_s
+        steps[agents] += 1
+        ended = agents[done | (steps[agents] >= max_steps)]
+        if callback is not None:
+            returns[agents] += discounts[agents] * rewards
+            discounts[agents] *= gamma
+            for i, agent in enumerate(ended.tolist()):
+                callback("episode", iteration=finished + i + 1, episode_length=int(steps[agent]),
+                         episode_return=float(returns[agent]))
+            returns[ended] = 0.0
+            discounts[ended] = 1.0
+        finished += len(ended)
+        if monitor is not None and finished - checked >= num_agents:
+            if monitor.update(Q, max_delta, finished - checked):
+                break
+            checked = finished
+            max_delta = 0.0
+        restarted = ended[:max(num_episodes - started, 0)]
+        states[restarted] = start_state
+        steps[restarted] = 0
+        started += len(restarted)
+        active[ended[len(restarted):]] = False
+
+    return Q, updates
+
+def run_replay_q_learning(model, gamma, alpha, num_episodes, start_state, max_steps, batch_size=32,
+                          replay_ratio=4, capacity=100_000, prioritized=False, seed=None, callback=None):
+    """
+    Q-learning avec rejeu d'expérience : un agent glouton parcourt num_episodes essais
+    (pas tirés par un GridSimulator) et range chaque transition dans un ReplayBuffer de capacité fixe. Après chaque pas,
+    replay_ratio mini-lots de batch_size transitions sont tirés du tampon (uniformément,
+    ou selon l'erreur TD avec prioritized=True, l'exposant beta des poids d'importance
+    passant alors de 0.4 à 1 au fil des essais) et appliqués à Q en une opération ;
+    chaque transition sert ainsi à plusieurs mises à jour. Les mises à jour d'une même
+    paire (s, a) dans un lot sont moyennées, comme dans run_batched_q_learning.
+    callback reçoit la longueur et le retour de chaque essai.
+    Renvoie Q, le nombre de pas effectués dans l'environnement et le nombre de mises
+    à jour TD (une par transition rejouée).
+    """
+    rng = np.random.default_rng(seed)
+    num_actions = model.next_states.shape[1]
+    Q = np.zeros((model.num_states, num_actions))
+    Q_flat = Q.reshape(-1)
+    simulator = GridSimulator(model, rng)
+    buffer = ReplayBuffer(capacity, prioritized)
+    terminal = model.terminal_mask
+    env_steps = 0
+    updates = 0
+
+    for episode in range(num_episodes):
+        beta = 0.4 + 0.6 * episode / max(num_episodes - 1, 1)
+        s = start_state
+        step_count = 0
+        episode_return = 0.0
+        while not terminal[s] and step_count < max_steps:
+            step_count += 1
+            env_steps += 1
+
+            q = Q[s]
+            ties = np.flatnonzero(q == q.max())
+            action = int(ties[rng.integers(len(ties))]) if len(ties) > 1 else int(ties[0])
+            next_state, reward, done = simulator.step(s, action)
+            buffer.add(s, action, reward, next_state, done)
+            episode_return += gamma ** (step_count - 1) * reward
+            s = next_state
+
+            for _ in range(replay_ratio if len(buffer) >= batch_size else 0):
+                indices, states, actions, rewards, next_states, dones, weights = buffer.sample(batch_size, rng, beta)
+                max_q_next = np.where(dones, 0.0, Q[next_states].max(axis=1))
+                td_error = rewards + gamma * max_q_next - Q[states, actions]
+                buffer.update_priorities(indices, td_error)
 
-    grid = []
-    gamma = None
-    alpha = None
-    num_episodes = None
+                pairs = states * num_actions + actions
+                _, inverse, counts = np.unique(pairs, return_inverse=True, return_counts=True)
+                np.add.at(Q_flat, pairs, alpha * weights * td_error / counts[inverse])
+                updates += batch_size
+
+        if callback is not None:
+            callback("episode", iteration=episode + 1, episode_length=step_count, episode_return=float(episode_return))
+
+    return Q, env_steps, updates
+
+def write_best_actions(model, Q, log):
+    """Écrit la meilleure action de chaque état selon Q (None pour les murs et les terminaux)."""
+    log.write("/**************************/\n")
+    log.write("Meilleure action pour chaque état :\n")
+    width = max(11, max(len(action) for action in model.actions) + 1)
     
-    for line in lines:
-        if ',' in line:
-            grid.append([int(x) for x in line.split(',')])
-        elif gamma is None:
-            gamma = float(line)
-        elif alpha is None:
-            alpha = float(line)
-        else:
-            num_episodes = int(line)
-            
-    rows = len(grid)
-    cols = len(grid[0])
-    num_states = rows * cols
+    for r in range(model.rows):
+        row_str = ""
+        for c in range(model.cols):
+            s = r * model.cols + c
+            if not model.valid_mask[s]:
+                row_str += "None".ljust(width)
+            else:
+                best_action, _ = choose_action(s, Q)
+                row_str += model.actions[best_action].ljust(width)
+        log.write(row_str + "\n")
+
+if njit is not None:
+    q_learning_episodes_jit = njit(cache=True)(q_learning_episodes)
+else:
+    q_learning_episodes_jit = None
+
+def write_early_stop(monitor, log):
+    log.write(f"Arrêt anticipé après {monitor.episodes} essais : politique gloutonne inchangée et "
+              f"max |ΔQ| < {monitor.tolerance} sur {monitor.window} essais\n\n")
+
+def run_q_learning(model, gamma, alpha, num_episodes, log, engine="python", seed=None, batch_size=256,
+                   replay_ratio=4, capacity=100_000, prioritized=False, callback=None, exploration="greedy",
+                   learning_rate="constant", stable_episodes=None, stop_tolerance=1e-3, conflict="mean"):
+    """
+    Apprend Q sur le modèle en écrivant la trace dans log (voir solve_q_learning pour
+    les moteurs). Avec la boucle Python, seed initialise le module random.
+    callback (voir metrics.MetricsWriter) reçoit la longueur et le retour actualisé de
+    chaque essai (sauf avec la boucle numba) et la durée des phases "learning" et "logging".
+    exploration (règle ou dictionnaire, voir exploration.Exploration.from_spec),
+    learning_rate ("constant" ou "visits") et l'arrêt anticipé (stable_episodes essais
+    stables à stop_tolerance près, voir exploration.ConvergenceMonitor) ne sont
+    disponibles qu'avec la boucle Python et engine="batched". conflict ("mean" ou "sum",
+    voir run_batched_q_learning) ne concerne que engine="batched".
+    Renvoie la table Q, tableau (S, nombre d'actions) indexé par état et indice d'action,
+    et le nombre de mises à jour TD effectuées.
+    """
+    rows, cols = model.rows, model.cols
+    num_states = model.num_states
     
-    Q = {s: {a: 0.0 for a in ACTIONS} for s in range(num_states)}
+    Q = np.zeros((num_states, len(model.actions)))
     
     start_state = (rows - 1) * cols 
+    max_steps_per_episode = 200 
     
-    with open(output_filename, 'w', encoding='utf-8') as log:
+    fast_engine = engine in ("numba", "batched", "replay")
+    if fast_engine and log.full:
+        raise ValueError(f"engine=\"{engine}\" n'écrit pas la trace complète : utiliser trace=\"summary\" ou \"off\"")
+    if fast_engine and engine == "numba" and q_learning_episodes_jit is None:
+        print("Avertissement : numba est introuvable, utilisation de la boucle Python.")
+        fast_engine = False
+    adaptive = exploration != "greedy" or learning_rate != "constant" or stable_episodes is not None
+    if adaptive and fast_engine and engine != "batched":
+        raise ValueError(f"L'exploration, le pas adaptatif et l'arrêt anticipé n'existent qu'avec la boucle "
+                         f"Python et engine=\"batched\" (engine={engine})")
+    if conflict != "mean" and engine != "batched":
+        raise ValueError(f"conflict=\"{conflict}\" n'existe qu'avec engine=\"batched\" (engine={engine})")
+    monitor = None
+    if stable_episodes is not None:
+        monitor = ConvergenceMonitor(model.valid_mask, stable_episodes, stop_tolerance)
+    
+    start_time = time.perf_counter()
+    if fast_engine:
+        if engine == "numba":
+            if seed is None:
+                seed = random.randrange(2 ** 32)
+            thresholds = model.outcome_thresholds()
+            Q, updates = q_learning_episodes_jit(Q, model.next_states, thresholds, model.state_rewards, model.terminal_mask,
+                                        start_state, gamma, alpha, num_episodes, max_steps_per_episode, seed)
+        elif engine == "replay":
+            Q, env_steps, updates = run_replay_q_learning(model, gamma, alpha, num_episodes, start_state, max_steps_per_episode,
+                                                 batch_size, replay_ratio, capacity, prioritized, seed, callback)
+            if log.summary:
+                log.write(f"Pas dans l'environnement : {env_steps}\n")
+        else:
+            rng = np.random.default_rng(seed)
+            explorer = Exploration.from_spec(exploration, num_states, len(model.actions), num_episodes,
+                                             learning_rate, rng)
+            Q, updates = run_batched_q_learning(model, gamma, alpha, num_episodes, start_state, max_steps_per_episode,
+                                       batch_size, rng, conflict, callback, explorer, monitor)
+            if monitor is not None and monitor.converged and log.summary:
+                write_early_stop(monitor, log)
+        report_phase(callback, "learning", start_time)
+        start_time = time.perf_counter()
+        if log.summary:
+            write_best_actions(model, Q, log)
+        report_phase(callback, "logging", start_time)
+        return Q, updates
+    
+    if seed is not None:
+        random.seed(seed)
+    explorer = Exploration.from_spec(exploration, num_states, len(model.actions), num_episodes, learning_rate, seed)
+    greedy = explorer.rule == "greedy"
+    updates = 0
         
-        for episode in range(1, num_episodes + 1):
-            log.write(f"Itération {episode}\n")
-            log.write(f"Départ de l'état S{start_state}\n\n")
+    for episode in range(1, num_episodes + 1):
+        log.write(f"Itération {episode}\n")
+        log.write(f"Départ de l'état S{start_state}\n\n")
             
-            s = start_state
-            step_count = 0
-            max_steps_per_episode = 200 
+        s = start_state
+        step_count = 0
+        episode_return = 0.0
+        max_delta = 0.0
+        explorer.set_episode(episode - 1)
             
-            while not is_terminal(s, grid, cols) and step_count < max_steps_per_episode:
-                step_count += 1
+        while not is_terminal(s, model) and step_count < max_steps_per_episode:
+            step_count += 1
                 
+            if greedy:
                 action, q_vals = choose_action(s, Q)
+            else:
+                action, q_vals = explorer.select(s, Q[s]), Q[s].tolist()
+            name = model.actions[action]
                 
-                log.write(f"Action à prendre pi(S{s}) = argmax{{ Q(S{s}, haut), Q(S{s}, bas), Q(S{s}, gauche), Q(S{s}, droite)}}\n")
-                log.write(f"\t\t\t= argmax{{ {q_vals[0]}, {q_vals[1]}, {q_vals[2]}, {q_vals[3]} }}\n")
-                log.write(f"\t\t\t= {action}\n")
+            if log.full:
+                q_names = ", ".join(f"Q(S{s}, {a})" for a in model.actions)
+                if greedy:
+                    log.write(f"Action à prendre pi(S{s}) = argmax{{ {q_names}}}\n")
+                    log.write(f"\t\t\t= argmax{{ {', '.join(str(q) for q in q_vals)} }}\n")
+                else:
+                    log.write(f"Action à prendre en S{s} ({explorer.rule}, paramètre {explorer.parameter}) "
+                              f"selon {{ {q_names}}}\n")
+                    log.write(f"\t\t\t= {{ {', '.join(str(q) for q in q_vals)} }}\n")
+                log.write(f"\t\t\t= {name}\n")
                 
-                next_state = simulate_environment(s, action, grid, rows, cols)
+            next_state = simulate_environment(s, action, model)
+            if log.full:
                 log.write(f"S{s} -> S{next_state}\n\n")
                 
-                R = get_reward(next_state, grid, cols)
-                q_old = Q[s][action]
+            R = get_reward(next_state, model)
+            updates += 1
+            episode_return += gamma ** (step_count - 1) * R
+            q_old = Q[s, action]
+            lr = explorer.visit(s, action, alpha)
                 
-                if is_terminal(next_state, grid, cols):
-                    max_q_next = 0.0
-                    Q[s][action] = q_old + alpha * (R + gamma * max_q_next - q_old)
+            if is_terminal(next_state, model):
+                max_q_next = 0.0
+                Q[s, action] = q_old + lr * (R + gamma * max_q_next - q_old)
                     
-                    log.write(f"Q(S{s},{action}) <- Q(S{s},{action}) + α * (R(S{next_state}) + γ * max{{ Q(S{next_state}, None) }} - Q(S{s},{action}))\n")
-                    log.write(f"\t\t\t = {q_old} + {alpha} * ({R} + {gamma} * {max_q_next} - {q_old})\n")
-                    log.write(f"\t\t\t = {Q[s][action]}\n\n")
+                if log.full:
+                    log.write(f"Q(S{s},{name}) <- Q(S{s},{name}) + α * (R(S{next_state}) + γ * max{{ Q(S{next_state}, None) }} - Q(S{s},{name}))\n")
+                    log.write(f"\t\t\t = {q_old} + {lr} * ({R} + {gamma} * {max_q_next} - {q_old})\n")
+                    log.write(f"\t\t\t = {Q[s, action]}\n\n")
                     
-                    log.write("Fin de l'essai\n\n\n")
-                    break
-                else:
-                    q_next_vals = [Q[next_state][a] for a in ACTIONS]
-                    max_q_next = max(q_next_vals)
-                    Q[s][action] = q_old + alpha * (R + gamma * max_q_next - q_old)
+                max_delta = max(max_delta, abs(Q[s, action] - q_old))
+                log.write("Fin de l'essai\n\n\n")
+                break
+            else:
+                max_q_next = max(Q[next_state].tolist())
+                Q[s, action] = q_old + lr * (R + gamma * max_q_next - q_old)
                     
-                    log.write(f"Q(S{s},{action}) <- Q(S{s},{action}) + α * (R(S{next_state}) + γ * max{{ Q(S{next_state}, haut), Q(S{next_state}, bas), Q(S{next_state}, gauche), Q(S{next_state}, droite) }} - Q(S{s},{action}))\n")
-                    log.write(f"\t\t\t = {q_old} + {alpha} * ({R} + {gamma} * {max_q_next} - {q_old})\n")
-                    log.write(f"\t\t\t = {Q[s][action]}\n\n")
+                if log.full:
+                    next_names = ", ".join(f"Q(S{next_state}, {a})" for a in model.actions)
+                    log.write(f"Q(S{s},{name}) <- Q(S{s},{name}) + α * (R(S{next_state}) + γ * max{{ {next_names} }} - Q(S{s},{name}))\n")
+                    log.write(f"\t\t\t = {q_old} + {lr} * ({R} + {gamma} * {max_q_next} - {q_old})\n")
+                    log.write(f"\t\t\t = {Q[s, action]}\n\n")
                     
-                    s = next_state
+                max_delta = max(max_delta, abs(Q[s, action] - q_old))
+                s = next_state
                     
-            if step_count >= max_steps_per_episode:
-                log.write("Arrêt prématuré de l'essai (limite de déplacements atteinte).\n\n\n")
+        if step_count >= max_steps_per_episode:
+            log.write("Arrêt prématuré de l'essai (limite de déplacements atteinte).\n\n\n")
+        if callback is not None:
+            callback("episode", iteration=episode, episode_length=step_count, episode_return=episode_return)
+        if monitor is not None and monitor.update(Q, max_delta):
+            write_early_stop(monitor, log)
+            break
 
-        log.write("/**************************/\n")
-        log.write("Meilleure action pour chaque état :\n")
-        
-        for r in range(rows):
-            row_str = ""
-            for c in range(cols):
-                s = r * cols + c
-                if grid[r][c] == 3: 
-                    row_str += f"{'None':<11}"
-                elif grid[r][c] in [1, 2]: 
-                    row_str += f"{'None':<11}"
-                else:
-                    best_action, _ = choose_action(s, Q)
-                    row_str += f"{best_action:<11}"
-            log.write(row_str + "\n")
+    report_phase(callback, "learning", start_time)
+    start_time = time.perf_counter()
+    if log.summary:
+        write_best_actions(model, Q, log)
+    report_phase(callback, "logging", start_time)
+
+    return Q, updates
+
+def solve_q_learning(input_filename="Q-Learning.txt", output_filename="log-file_QL.txt", trace="full", compress=False,
+                     engine="python", seed=None, batch_size=256, cache_dir=None, replay_ratio=4, capacity=100_000,
+                     prioritized=False, metrics=None, export=None, dynamics=None, exploration="greedy",
+                     learning_rate="constant", stable_episodes=None, stop_tolerance=1e-3, gamma=None, alpha=None,
+                     num_episodes=None, conflict="mean"):
+    """
+    Apprend Q par Q-learning sur des essais partant du coin inférieur gauche.
+    trace="full" | "summary" | "off" règle le détail de la trace (voir TraceWriter),
+    compress=True l'écrit en gzip. engine="numba" exécute la boucle compilée
+    q_learning_episodes et engine="batched" fait avancer batch_size agents en
+    parallèle (run_batched_q_learning), avec des tirages initialisés par seed.
+    engine="replay" rejoue les transitions passées (run_replay_q_learning) : batch_size
+    est alors la taille des mini-lots, replay_ratio le nombre de mini-lots par pas,
+    capacity la taille du tampon et prioritized active le tirage selon l'erreur TD.
+    Avec engine="batched", conflict="mean" | "sum" règle les mises à jour simultanées
+    d'une même paire (s, a) (voir run_batched_q_learning).
+    Ces trois moteurs n'écrivent pas la trace complète : ils demandent trace="summary"
+    ou "off" (ValueError sinon).
+    input_filename est lu par grid_config.load_config ; cache_dir garde le modèle
+    compilé sur disque entre deux exécutions. metrics (fichier .csv / .jsonl ou
+    callback) reçoit la longueur et le retour de chaque essai et la durée des phases.
+    export enregistre Q, la politique gloutonne et U = max Q dans un fichier binaire
+    (voir policy_store). dynamics remplace la dynamique d'origine (voir
+    dynamics.Dynamics.from_spec).
+    Avec la boucle Python ou engine="batched", exploration="epsilon" | "softmax" | "ucb"
+    (ou un dictionnaire, voir exploration.Exploration.from_spec) remplace le choix
+    glouton par une exploration dont le paramètre décroît au fil des essais,
+    learning_rate="visits" adapte le pas au nombre de visites de chaque paire (s, a),
+    et stable_episodes arrête l'apprentissage quand la politique gloutonne et
+    max |ΔQ| (< stop_tolerance) sont stables sur ce nombre d'essais.
+    gamma, alpha et num_episodes remplacent les valeurs du fichier (obligatoires avec
+    une grille .npy) ; un paramètre manquant lève ValueError.
+    Renvoie la table Q, tableau (S, nombre d'actions) indexé par état et indice d'action.
+    """
+    try:
+        grid, params = load_config(input_filename, POSITIONAL_PARAMS["q_learning"])
+    except FileNotFoundError:
+        print(f"Erreur : Le fichier {input_filename} est introuvable.")
+        return
+
+    gamma, alpha, num_episodes = solver_params(params, "q_learning", input_filename, gamma=gamma, alpha=alpha,
+                                               num_episodes=num_episodes)
+    callback, writer = open_metrics(metrics, "q_learning")
+    start_time = time.perf_counter()
+    model = load_model(grid, cache_dir, dynamics)
+    report_phase(callback, "model_build", start_time)
+
+    with TraceWriter(output_filename, trace, compress) as log:
+        Q, _ = run_q_learning(model, gamma, alpha, num_episodes, log, engine, seed, batch_size, replay_ratio,
+                              capacity, prioritized, callback, exploration, learning_rate, stable_episodes,
+                              stop_tolerance, conflict)
+    if writer is not None:
+        writer.close()
+    if export is not None:
+        save_policy(export, model, Q.argmax(axis=1), np.where(model.valid_mask, Q.max(axis=1), 0.0), gamma, Q)
+    return Q
 
 if __name__ == "__main__":
     solve_q_learning()
\ No newline at end of file
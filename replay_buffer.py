@@ -0,0 +1,135 @@
+import numpy as np
+
+class SumTree:
+    """
+    Arbre de sommes sur un tableau : la feuille i porte la priorité de la transition i
+    et chaque nœud la somme de ses deux fils (racine en tree[1]). Mise à jour et
+    tirage proportionnel coûtent O(log capacité) et sont vectorisés sur un lot.
+    """
+
+    __slots__ = ("capacity", "depth", "tree", "pending_updates")
+
+    def __init__(self, capacity):
+        self.capacity = 1
+        self.depth = 0
+        while self.capacity < capacity:
+            self.capacity *= 2
+            self.depth += 1
+        self.tree = np.zeros(2 * self.capacity)
+        self.pending_updates = 0
+
+    @property
+    def total(self):
+        return self.tree[1]
+
+    def update(self, indices, priorities):
+        """
+        Fixe la priorité des feuilles indices (la dernière valeur l'emporte en cas de
+        doublon) et reporte l'écart sur tous leurs ancêtres en une seule opération.
+        """
+        indices = np.asarray(indices).ravel()
+        priorities = np.broadcast_to(priorities, indices.shape)[::-1]
+        leaves, last = np.unique(indices[::-1], return_index=True)
+        nodes = leaves + self.capacity
+        delta = priorities[last] - self.tree[nodes]
+        self.tree[nodes] = priorities[last]
+
+        ancestors = nodes[:, None] >> np.arange(1, self.depth + 1)
+        np.add.at(self.tree, ancestors.ravel(), np.repeat(delta, self.depth))
+
+        # Les écarts cumulés finissent par accumuler des erreurs d'arrondi.
+        self.pending_updates += len(leaves)
+        if self.pending_updates >= self.capacity:
+            self.rebuild()
+
+    def rebuild(self):
+        """Recalcule exactement tous les nœuds internes à partir des feuilles."""
+        for level in range(self.depth - 1, -1, -1):
+            first, last = 1 << level, 2 << level
+            self.tree[first:last] = self.tree[2 * first:2 * last:2] + self.tree[2 * first + 1:2 * last:2]
+        self.pending_updates = 0
+
+    def find(self, values):
+        """Feuille atteinte par chaque valeur de values (entre 0 et total), en descendant l'arbre."""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            nodes <<= 1
+            left = self.tree[nodes]
+            go_right = values >= left
+            values -= left * go_right
+            nodes += go_right
+        return nodes - self.capacity
+
+class ReplayBuffer:
+    """
+    Tampon circulaire de transitions (s, a, r, s', fin) de capacité fixe, stocké dans
+    des tableaux préalloués : une fois plein, chaque nouvelle transition remplace la
+    plus ancienne et la mémoire reste bornée.
+    Avec prioritized=True, les transitions sont tirées proportionnellement à
+    (|erreur TD| + epsilon) ** priority_exponent grâce à un SumTree, et sample renvoie
+    les poids d'importance (N * P) ** -beta normalisés par leur maximum.
+    """
+
+    __slots__ = ("capacity", "size", "position", "states", "actions", "rewards", "next_states", "dones",
+                 "tree", "priority_exponent", "epsilon", "max_priority")
+
+    def __init__(self, capacity, prioritized=False, priority_exponent=0.6, epsilon=1e-3):
+        self.capacity = capacity
+        self.size = 0
+        self.position = 0
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int8)
+        self.rewards = np.zeros(capacity)
+        self.next_states = np.zeros(capacity, dtype=np.int64)
+        self.dones = np.zeros(capacity, dtype=bool)
+
+        self.tree = SumTree(capacity) if prioritized else None
+        self.priority_exponent = priority_exponent
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        """Ajoute une transition ; en mode prioritaire, elle reçoit la plus forte priorité vue."""
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        if self.tree is not None:
+            self.tree.update([i], self.max_priority)
+
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, batch_size, rng, beta=0.4):
+        """
+        Tire batch_size transitions (avec remise). Renvoie leurs indices, les tableaux
+        (s, a, r, s', fin) correspondants et les poids d'importance (tous à 1 en
+        tirage uniforme).
+        """
+        if self.tree is None:
+            indices = rng.integers(self.size, size=batch_size)
+            weights = np.ones(batch_size)
+        else:
+            # Un tirage par segment de même masse : le lot couvre toute la distribution.
+            total = self.tree.total
+            values = (np.arange(batch_size) + rng.random(batch_size)) * (total / batch_size)
+            indices = np.minimum(self.tree.find(np.minimum(values, np.nextafter(total, 0))), self.size - 1)
+            probabilities = self.tree.tree[indices + self.tree.capacity] / total
+            weights = (self.size * probabilities) ** -beta
+            weights /= weights.max()
+        return (indices, self.states[indices], self.actions[indices], self.rewards[indices],
+                self.next_states[indices], self.dones[indices], weights)
+
+    def update_priorities(self, indices, td_errors):
+        """Met à jour la priorité des transitions rejouées à partir de leur nouvelle erreur TD."""
+        if self.tree is None:
+            return
+        priorities = (np.abs(td_errors) + self.epsilon) ** self.priority_exponent
+        self.tree.update(indices, priorities)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
@@ -0,0 +1,96 @@
+import numpy as np
+
+from simulator import GridSimulator
+
+# Issue d'un plan déterministe.
+REACHED_TERMINAL = 0
+CYCLE = 1
+TRUNCATED = 2
+
+def extract_plans(model, best_actions, start_states, max_length=None):
+    """
+    Suit la politique best_actions depuis chaque état de start_states en prenant
+    toujours l'issue voulue (l'issue 0, la plus probable avec une dynamique
+    configurée ; comme write_optimal_plan), tous les départs avançant
+    ensemble. Un cycle est détecté par l'algorithme de Brent (une tortue par départ),
+    sans garder l'ensemble des états visités.
+    Renvoie paths (départs x longueur maximale, complété par -1 ; la dernière case
+    d'un chemin est le terminal atteint ou le premier état répété), la longueur de
+    chaque chemin en nombre d'actions et son issue (REACHED_TERMINAL, CYCLE, TRUNCATED).
+    """
+    start_states = np.asarray(start_states, dtype=np.int64)
+    if max_length is None:
+        max_length = int(model.valid_mask.sum()) + 1
+    next_state = model.next_states[np.arange(model.num_states), best_actions, 0]
+
+    num_starts = len(start_states)
+    paths = [start_states.copy()]
+    current = start_states.copy()
+    status = np.full(num_starts, TRUNCATED)
+    status[model.terminal_mask[current]] = REACHED_TERMINAL
+    lengths = np.zeros(num_starts, dtype=np.int64)
+
+    tortoise = current.copy()
+    power = np.ones(num_starts, dtype=np.int64)
+    lam = np.zeros(num_starts, dtype=np.int64)
+    active = status == TRUNCATED
+    for step in range(1, max_length + 1):
+        if not active.any():
+            break
+        current = np.where(active, next_state[current], -1)
+        paths.append(current)
+        lengths[active] = step
+        lam[active] += 1
+
+        reached = active & model.terminal_mask[np.maximum(current, 0)]
+        status[reached] = REACHED_TERMINAL
+        looped = active & ~reached & (current == tortoise)
+        status[looped] = CYCLE
+        active &= ~(reached | looped)
+
+        reset = active & (lam == power)
+        tortoise[reset] = current[reset]
+        power[reset] *= 2
+        lam[reset] = 0
+
+    paths = np.stack(paths, axis=1)
+    # Brent repère le cycle un peu après la première répétition : on coupe le chemin
+    # à la première réapparition d'un état.
+    for k in np.flatnonzero(status == CYCLE).tolist():
+        row = paths[k, :lengths[k] + 1]
+        _, first = np.unique(row, return_index=True)
+        seen = np.zeros(len(row), dtype=bool)
+        seen[first] = True
+        cut = int(np.argmin(seen))
+        paths[k, cut + 1:] = -1
+        lengths[k] = cut
+    return paths[:, :lengths.max(initial=0) + 1], lengths, status
+
+def rollout_returns(model, best_actions, start_states, num_rollouts, gamma, max_steps=200, seed=None):
+    """
+    num_rollouts trajectoires stochastiques (issues tirées selon model.probs) par état
+    de départ, sous la politique best_actions, simulées ensemble par un GridSimulator.
+    Une trajectoire s'arrête sur un terminal ou après max_steps pas.
+    Renvoie les retours actualisés et les longueurs, tableaux (départs x num_rollouts).
+    """
+    simulator = GridSimulator(model, seed)
+    start_states = np.asarray(start_states, dtype=np.int64)
+
+    states = np.repeat(start_states, num_rollouts)
+    returns = np.zeros(len(states))
+    lengths = np.zeros(len(states), dtype=np.int64)
+    active = np.flatnonzero(~model.terminal_mask[states])
+    discount = 1.0
+    for step in range(max_steps):
+        if len(active) == 0:
+            break
+        s = states[active]
+        next_s, rewards, done = simulator.step_batch(s, best_actions[s])
+        returns[active] += discount * rewards
+        lengths[active] += 1
+        states[active] = next_s
+        discount *= gamma
+        active = active[~done]
+
+    shape = (len(start_states), num_rollouts)
+    return returns.reshape(shape), lengths.reshape(shape)
@@ -0,0 +1,93 @@
+import numpy as np
+
+def build_alias_tables(distributions):
+    """
+    Tables d'alias (méthode de Vose) de chaque ligne de distributions (n, K) : une
+    issue se tire avec un seul nombre u uniforme, x = u * K, colonne k = partie
+    entière de x, puis k si x - k < thresholds[ligne, k], sinon aliases[ligne, k].
+    Les lignes sont traitées ensemble : à chaque étape, la plus petite colonne
+    restante de chaque ligne est complétée par la plus grande.
+    Renvoie thresholds (n, K) et aliases (n, K, int8).
+    """
+    distributions = np.asarray(distributions, dtype=np.float64)
+    n, num_outcomes = distributions.shape
+    scaled = distributions * num_outcomes
+    thresholds = np.ones((n, num_outcomes))
+    aliases = np.broadcast_to(np.arange(num_outcomes, dtype=np.int8), (n, num_outcomes)).copy()
+    finished = np.zeros((n, num_outcomes), dtype=bool)
+    rows = np.arange(n)
+
+    for _ in range(num_outcomes - 1):
+        small = np.where(finished, np.inf, scaled).argmin(axis=1)
+        large = np.where(finished, -np.inf, scaled).argmax(axis=1)
+        # Une ligne dont toutes les colonnes restantes valent 1 est déjà équilibrée.
+        pending = scaled[rows, small] < 1.0
+        r, s, l = rows[pending], small[pending], large[pending]
+        thresholds[r, s] = scaled[r, s]
+        aliases[r, s] = l
+        scaled[r, l] -= 1.0 - scaled[r, s]
+        finished[r, s] = True
+    return thresholds, aliases
+
+class GridSimulator:
+    """
+    Simulateur de l'environnement pour les rollouts et le Q-learning : les issues de
+    chaque paire (état, action) du modèle sont tirées par table d'alias, avec un seul
+    nombre aléatoire par pas, pris dans des blocs de block_size nombres tirés d'avance
+    par un numpy Generator (seed peut être une graine ou un Generator déjà créé).
+    Les paires qui ont la même distribution d'issues partagent leur table : une seule
+    pour la dynamique d'origine, quelques-unes (selon les rebonds) pour une dynamique
+    configurée. Le simulateur lit les tableaux du modèle au moment de sa création.
+    """
+
+    def __init__(self, model, seed=None, block_size=1 << 16):
+        self.rng = np.random.default_rng(seed)
+        self.block_size = block_size
+        self.next_states = model.next_states
+        self.state_rewards = model.state_rewards
+        self.terminal_mask = model.terminal_mask
+        self.num_outcomes = model.next_states.shape[2]
+
+        if model.dynamics is None:
+            distributions = model.probs[:1, 0]
+            self.table_index = None
+        else:
+            distributions, index = np.unique(model.probs.reshape(-1, self.num_outcomes), axis=0,
+                                              return_inverse=True)
+            self.table_index = index.reshape(model.probs.shape[:2]).astype(np.int32)
+        self.thresholds, self.aliases = build_alias_tables(distributions)
+
+        self._randoms = np.empty(0)
+        self._position = 0
+
+    def _draw(self, n):
+        """n nombres uniformes pris dans le bloc courant (un nouveau bloc est tiré s'il n'en reste pas assez)."""
+        if self._position + n > len(self._randoms):
+            self._randoms = self.rng.random(max(self.block_size, n))
+            self._position = 0
+        values = self._randoms[self._position:self._position + n]
+        self._position += n
+        return values
+
+    def step_batch(self, states, actions):
+        """
+        Avance chaque paire (states[i], actions[i]) d'un pas.
+        Renvoie les états atteints, les récompenses reçues et les indicateurs de fin.
+        """
+        states = np.asarray(states)
+        actions = np.asarray(actions)
+        x = self._draw(len(states)) * self.num_outcomes
+        columns = np.minimum(x.astype(np.intp), self.num_outcomes - 1)
+        tables = 0 if self.table_index is None else self.table_index[states, actions]
+        outcomes = np.where(x - columns < self.thresholds[tables, columns], columns, self.aliases[tables, columns])
+        next_states = self.next_states[states, actions, outcomes]
+        return next_states, self.state_rewards[next_states], self.terminal_mask[next_states]
+
+    def step(self, state, action):
+        """Un seul pas depuis (state, action) : renvoie l'état atteint, la récompense et l'indicateur de fin."""
+        x = float(self._draw(1)[0]) * self.num_outcomes
+        column = min(int(x), self.num_outcomes - 1)
+        table = 0 if self.table_index is None else int(self.table_index[state, action])
+        outcome = column if x - column < self.thresholds[table, column] else int(self.aliases[table, column])
+        next_state = int(self.next_states[state, action, outcome])
+        return next_state, float(self.state_rewards[next_state]), bool(self.terminal_mask[next_state])
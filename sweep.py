@@ -0,0 +1,159 @@
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from grid_config import load_config
+from mdp_model import MDPModel
+from policy_iteration import run_policy_iteration
+from q_learning import run_q_learning
+from trace_log import TraceWriter
+from value_iteration import run_value_iteration
+
+# Paramètres balayés par chaque algorithme.
+ALGORITHM_PARAMS = {
+    "value_iteration": ("gamma", "tolerance"),
+    "policy_iteration": ("gamma",),
+    "q_learning": ("gamma", "alpha", "num_episodes"),
+}
+
+# Moteurs sans trace utilisés par défaut pendant un balayage.
+DEFAULT_OPTIONS = {
+    "value_iteration": {"engine": "numpy"},
+    "policy_iteration": {"evaluation": "sparse"},
+    "q_learning": {"engine": "batched"},
+}
+
+DEFAULT_PARAM_GRID = {
+    "gamma": [0.5, 0.9],
+    "tolerance": [0.01],
+    "alpha": [0.5],
+    "num_episodes": [20],
+}
+
+# Modèles compilés par processus de travail, indexés par numéro de carte.
+_worker_models = {}
+
+def _get_model(map_index, map_file):
+    """Compile la carte au premier usage dans ce processus, puis la réutilise."""
+    if map_index not in _worker_models:
+        _worker_models[map_index] = MDPModel(load_config(map_file, positional=None)[0])
+    return _worker_models[map_index]
+
+def _run_task(task):
+    """Exécute un solveur sans trace et renvoie ses résultats et son temps de calcul."""
+    algorithm, map_index, map_file, params, options, seed = task
+    model = _get_model(map_index, map_file)
+    log = TraceWriter(None, "off")
+
+    start_time = time.perf_counter()
+    if algorithm == "value_iteration":
+        U, actions, iterations = run_value_iteration(model, params["gamma"], params["tolerance"], log, **options)
+    elif algorithm == "policy_iteration":
+        U, actions, iterations = run_policy_iteration(model, params["gamma"], log, **options)
+    else:
+        Q, _ = run_q_learning(model, params["gamma"], params["alpha"], params["num_episodes"], log,
+                           seed=seed, **options)
+        U = np.where(model.valid_mask, Q.max(axis=1), 0.0)
+        actions = Q.argmax(axis=1)
+        iterations = params["num_episodes"]
+    elapsed = time.perf_counter() - start_time
+
+    return {
+        "algorithm": algorithm,
+        "map": map_index,
+        "params": params,
+        "seed": seed,
+        "iterations": iterations,
+        "time": elapsed,
+        "utilities": np.asarray(U, dtype=np.float64),
+        "policy": np.asarray(actions, dtype=np.int8),
+    }
+
+def build_tasks(map_files, algorithms, param_grid, options, seed):
+    """
+    Produit cartésien des cartes et des paramètres utiles à chaque algorithme.
+    Chaque tâche reçoit une graine dérivée de seed et de son rang : un balayage
+    relancé avec la même graine refait exactement les mêmes tirages.
+    """
+    tasks = []
+    for map_index, map_file in enumerate(map_files):
+        for algorithm in algorithms:
+            names = ALGORITHM_PARAMS[algorithm]
+            for values in itertools.product(*(param_grid[name] for name in names)):
+                tasks.append([algorithm, map_index, map_file, dict(zip(names, values)),
+                              {**DEFAULT_OPTIONS[algorithm], **options.get(algorithm, {})}])
+
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+    return [tuple(task) + (int(s.generate_state(1)[0]),) for task, s in zip(tasks, seeds)]
+
+def save_results(results, map_files, output_filename):
+    """
+    Écrit les résultats dans un seul fichier .npz en colonnes : une colonne par
+    grandeur scalaire, et les utilités / politiques de toutes les exécutions
+    concaténées, la tranche de l'exécution i étant offsets[i]:offsets[i + 1].
+    """
+    def column(name, missing):
+        return np.array([r["params"].get(name, missing) for r in results])
+
+    sizes = [len(r["utilities"]) for r in results]
+    np.savez_compressed(
+        output_filename,
+        algorithm=np.array([r["algorithm"] for r in results]),
+        map=np.array([r["map"] for r in results]),
+        map_files=np.array(map_files),
+        gamma=column("gamma", np.nan),
+        tolerance=column("tolerance", np.nan),
+        alpha=column("alpha", np.nan),
+        num_episodes=column("num_episodes", -1),
+        seed=np.array([r["seed"] for r in results], dtype=np.uint32),
+        iterations=np.array([r["iterations"] for r in results]),
+        time=np.array([r["time"] for r in results]),
+        offsets=np.concatenate([[0], np.cumsum(sizes)]),
+        utilities=np.concatenate([r["utilities"] for r in results]),
+        policies=np.concatenate([r["policy"] for r in results]),
+    )
+
+def run_sweep(map_files, algorithms=tuple(ALGORITHM_PARAMS), param_grid=None, options=None,
+              output_filename="sweep-results.npz", workers=None, seed=0):
+    """
+    Lance tous les couples (carte, paramètres) des algorithmes demandés sur un pool
+    de workers processus (un par cœur par défaut) et rassemble les résultats dans
+    output_filename. param_grid complète DEFAULT_PARAM_GRID ; options complète,
+    par algorithme, les arguments des fonctions run_*.
+    """
+    param_grid = {**DEFAULT_PARAM_GRID, **(param_grid or {})}
+    tasks = build_tasks(map_files, algorithms, param_grid, options or {}, seed)
+
+    workers = workers or os.cpu_count()
+    # Les tâches d'une même carte sont regroupées pour réutiliser le modèle compilé.
+    chunksize = max(1, len(tasks) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_run_task, tasks, chunksize=chunksize))
+
+    save_results(results, map_files, output_filename)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Balayage de paramètres des trois solveurs sur plusieurs cartes.")
+    parser.add_argument("maps", nargs="*", default=["value-iteration.txt"])
+    parser.add_argument("--algorithms", nargs="+", default=list(ALGORITHM_PARAMS), choices=list(ALGORITHM_PARAMS))
+    parser.add_argument("--gamma", nargs="+", type=float, default=DEFAULT_PARAM_GRID["gamma"])
+    parser.add_argument("--tolerance", nargs="+", type=float, default=DEFAULT_PARAM_GRID["tolerance"])
+    parser.add_argument("--alpha", nargs="+", type=float, default=DEFAULT_PARAM_GRID["alpha"])
+    parser.add_argument("--episodes", nargs="+", type=int, default=DEFAULT_PARAM_GRID["num_episodes"])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="sweep-results.npz")
+    args = parser.parse_args()
+
+    param_grid = {"gamma": args.gamma, "tolerance": args.tolerance, "alpha": args.alpha, "num_episodes": args.episodes}
+    results = run_sweep(args.maps, args.algorithms, param_grid, output_filename=args.output,
+                        workers=args.workers, seed=args.seed)
+    print(f"{len(results)} exécutions enregistrées dans {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import gzip
+
+TRACE_LEVELS = {"off": 0, "summary": 1, "full": 2}
+
+
+class TraceWriter:
+    """
+    Trace des solveurs, avec trois niveaux : "off" (rien n'est écrit), "summary"
+    (une ligne par itération et les résultats finaux) et "full" (détail de chaque
+    calcul). Les lignes sont accumulées puis écrites par blocs d'au plus
+    buffer_size caractères, éventuellement compressées en gzip : la mémoire
+    utilisée reste bornée quelle que soit la longueur de la trace.
+    Les solveurs testent log.full / log.summary avant de formater une ligne.
+    """
+
+    def __init__(self, filename, level="full", compress=False, buffer_size=1 << 20):
+        if level not in TRACE_LEVELS:
+            raise ValueError(f"Niveau de trace inconnu : {level}")
+        self.summary = TRACE_LEVELS[level] >= TRACE_LEVELS["summary"]
+        self.full = TRACE_LEVELS[level] >= TRACE_LEVELS["full"]
+        self.buffer_size = buffer_size
+        self._chunks = []
+        self._size = 0
+
+        if not self.summary:
+            self._file = None
+        elif compress or filename.endswith(".gz"):
+            self._file = gzip.open(filename, 'wt', encoding='utf-8')
+        else:
+            self._file = open(filename, 'w', encoding='utf-8')
+
+    def write(self, text):
+        if self._file is None:
+            return
+        self._chunks.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._chunks:
+            self._file.write("".join(self._chunks))
+            self._chunks = []
+            self._size = 0
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
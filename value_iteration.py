@@ -1,219 +1,507 @@
+import heapq
 import math
+import time
+from collections import deque
 
-ACTIONS = ['haut', 'bas', 'gauche', 'droite']
+import numpy as np
 
-def get_orthogonal_actions(action):
-    if action in ['haut', 'bas']:
-        return ['gauche', 'droite']
-    else:
-        return ['haut', 'bas']
-
-def apply_move(state, action, grid, rows, cols):
-    """Calcule l'état d'arrivée après un mouvement (incluant les rebonds)."""
-    r = state // cols
-    c = state % cols
-    
-    nr, nc = r, c
-    if action == 'haut':
-        nr -= 1
-    elif action == 'bas':
-        nr += 1
-    elif action == 'gauche':
-        nc -= 1
-    elif action == 'droite':
-        nc += 1
-        
-    if nr < 0 or nr >= rows or nc < 0 or nc >= cols:
-        return state
-    
-    next_state = nr * cols + nc
-    if grid[nr][nc] == 3:
-        return state
-        
-    return next_state
-
-def get_reward(state, grid, cols):
-    """Renvoie la récompense associée à un état cible."""
-    r = state // cols
-    c = state % cols
-    cell = grid[r][c]
-    
-    if cell == 1:   
-        return 1.0
-    elif cell == 2: 
-        return -1.0
-    else:          
-        return -0.04
+from grid_config import POSITIONAL_PARAMS, load_config, load_model, solver_params
+from metrics import open_metrics, report_phase
+from parallel_sweeps import run_value_iteration_parallel
+from policy_store import save_policy
+from rollout import extract_plans
+from trace_log import TraceWriter
 
 def format_q_calc(r, gamma, u):
     """Formate la chaîne de calcul pour qu'elle corresponde exactement à la trace."""
     s = f"[{r:.2f}+{gamma}*{u:.3f}]"
     return s.replace("-0.04+", "-0.04+").replace("1.00+", "1.0+").replace("-1.00+", "-1.0+")
 
-def solve_value_iteration(input_filename="value-iteration.txt", output_filename="log-file_VI.txt"):
-    try:
-        with open(input_filename, 'r') as f:
-            lines = [line.strip() for line in f if line.strip()]
-    except FileNotFoundError:
-        print(f"Erreur : Le fichier {input_filename} est introuvable.")
-        return
+def q_with_trace(s, a, U, gamma, next_states, probs, rewards, with_trace=True):
+    """
+    Calcule Q(s, a) à partir du modèle (un terme par issue possible de l'action) et renvoie
+    aussi le détail du calcul pour la trace (None si with_trace est faux : la chaîne
+    n'est alors pas formatée).
+    """
+    q_total = 0.0
+    terms = []
+    for next_s, prob in zip(next_states[s][a], probs[s][a]):
+        if prob == 0:
+            continue
+        q_total += prob * (rewards[next_s] + gamma * U[next_s])
+        if with_trace:
+            terms.append(f"{prob}*{format_q_calc(rewards[next_s], gamma, U[next_s])}")
+    if not with_trace:
+        return q_total, None
+    return q_total, f"{' + '.join(terms)} = {q_total:.4f}"
+
+def write_utilities_table(model, U, log):
+    """Écrit la grille des utilités (les murs et les terminaux gardent leur valeur fixe)."""
+    for r in range(model.rows):
+        row_str = ""
+        for c in range(model.cols):
+            s = r * model.cols + c
+            cell = model.grid[r, c]
+            if cell == 3:
+                row_str += "  0.000 "
+            elif cell == 1:
+                row_str += "  1.000 "
+            elif cell == 2:
+                row_str += " -1.000 "
+            else:
+                row_str += f"{U[s]:7.3f} "
+        log.write(row_str + "\n")
+
+def write_policy_table(model, best_actions, log):
+    """Écrit la meilleure action (indice dans model.actions) de chaque état sous forme de grille."""
+    log.write("Meilleure action de chaque état :\n")
+    width = max(9, max(len(action) for action in model.actions) + 1)
+    for r in range(model.rows):
+        row_str = ""
+        for c in range(model.cols):
+            s = r * model.cols + c
+            cell = model.grid[r, c]
+            if cell == 3:
+                row_str += "MUR".ljust(width)
+            elif cell == 1:
+                row_str += "BUT".ljust(width)
+            elif cell == 2:
+                row_str += "FANT".ljust(width)
+            else:
+                row_str += model.actions[best_actions[s]].ljust(width)
+        log.write(row_str + "\n")
+
+def write_optimal_plan(model, best_actions, log):
+    """
+    Suit la politique depuis le coin inférieur gauche jusqu'à un état terminal ou
+    jusqu'au premier état déjà visité (voir rollout.extract_plans).
+    """
+    log.write("\nPlan optimal:\n")
+    best_actions = np.asarray(best_actions)
+    paths, lengths, _ = extract_plans(model, best_actions, [(model.rows - 1) * model.cols])
+    path = [model.actions[a] for a in best_actions[paths[0, :lengths[0]]].tolist()]
+
+    path.append("but")
+    log.write(" -> ".join(path) + "\n")
 
-    grid = []
-    gamma = 0.0
-    tolerance = 0.0
-    
-    for line in lines:
-        if ',' in line:
-            grid.append([int(x) for x in line.split(',')])
-        elif gamma == 0.0:
-            gamma = float(line)
+STOPPING_RULES = ("sum", "max-norm", "span", "policy")
+
+def delta_range(delta, has_terminals):
+    """
+    Plus petit et plus grand écart U'(s) - U(s) ; les terminaux, de valeur fixe 0,
+    comptent comme un écart nul.
+    """
+    low = delta.min(initial=np.inf)
+    high = delta.max(initial=-np.inf)
+    if has_terminals or len(delta) == 0:
+        low, high = min(low, 0.0), max(high, 0.0)
+    return float(low), float(high)
+
+def value_bounds(delta, gamma, has_terminals):
+    """
+    Bornes de MacQueen : après U' = T(U), avec delta = U' - U sur les états actifs,
+    U' + γ / (1 - γ) * min(delta) <= U* <= U' + γ / (1 - γ) * max(delta) en tout état.
+    Renvoie les deux décalages (inférieur, supérieur) à ajouter à U' (infinis si γ >= 1).
+    """
+    if gamma >= 1:
+        return -math.inf, math.inf
+    low, high = delta_range(delta, has_terminals)
+    factor = gamma / (1 - gamma)
+    return factor * low, factor * high
+
+def run_value_iteration_numpy(model, gamma, tolerance, log, callback=None, stopping="sum", stable_sweeps=3):
+    """
+    Itération de la valeur vectorisée : chaque itération se résume à quelques
+    opérations sur les tableaux du modèle. callback reçoit les mesures de chaque
+    itération (voir metrics.MetricsWriter).
+    stopping choisit le critère d'arrêt (tolerance joue le rôle de ε) :
+    - "sum" : somme des |U'(s) - U(s)| < tolerance (critère d'origine) ;
+    - "max-norm" : max |U'(s) - U(s)| < ε (1 - γ) / γ, ce qui garantit |U - U*| < ε ;
+    - "span" : max - min de U' - U sous ce même seuil ; U est alors recentré entre
+      les bornes de MacQueen et reste à moins de ε / 2 de U* (utile surtout sans
+      terminal, les terminaux fixant un écart nul) ;
+      ces deux critères demandent γ < 1 ;
+    - "policy" : la politique gloutonne n'a pas changé pendant stable_sweeps balayages
+      (sans garantie, mais les bornes indiquent la précision atteinte).
+    Les bornes sur U* sont écrites dans la trace. Renvoie U, la meilleure action
+    (indice) de chaque état et le nombre d'itérations.
+    """
+    if stopping not in STOPPING_RULES:
+        raise ValueError(f"Critère d'arrêt inconnu : {stopping}")
+    if stopping in ("max-norm", "span") and gamma >= 1:
+        # Le seuil ε (1 - γ) / γ est nul : ces critères ne seraient jamais atteints.
+        raise ValueError(f"Le critère d'arrêt {stopping} demande gamma < 1")
+    active = model.valid_mask
+    has_terminals = bool(model.terminal_mask.any())
+    threshold = tolerance * (1 - gamma) / gamma if gamma > 0 else math.inf
+
+    U = np.zeros(model.num_states)
+    previous_actions = None
+    stable = 0
+    iteration = 1
+    while True:
+        if callback is not None:
+            start_time = time.perf_counter()
+        Q = model.q_values(U, gamma)
+        U_prime = np.where(active, Q.max(axis=1), U)
+        delta = (U_prime - U)[active]
+        diff = np.abs(delta)
+        sum_diff = diff.sum()
+        if callback is not None:
+            callback("iteration", iteration=iteration, residual_sum=float(sum_diff),
+                     residual_max=float(diff.max(initial=0.0)), time=time.perf_counter() - start_time)
+        if log.summary:
+            log.write(f"Itération {iteration} : Somme des differences |Us - U'(S)| = {sum_diff:.6f}\n")
+
+        U = U_prime
+        if stopping == "sum":
+            done = sum_diff < tolerance
+        elif stopping == "max-norm":
+            done = diff.max(initial=0.0) < threshold
+        elif stopping == "span":
+            low, high = delta_range(delta, has_terminals)
+            done = high - low < threshold
         else:
-            tolerance = float(line)
-            
-    rows = len(grid)
-    cols = len(grid[0])
-    num_states = rows * cols
-    
-    U = [0.0] * num_states
-    
-    walls = [i for i in range(num_states) if grid[i // cols][i % cols] == 3]
-    terminals = [i for i in range(num_states) if grid[i // cols][i % cols] in [1, 2]]
-    
-    with open(output_filename, 'w', encoding='utf-8') as log:
-        
-        iteration = 1
+            actions = Q.argmax(axis=1)
+            stable = stable + 1 if previous_actions is not None and np.array_equal(actions, previous_actions) else 0
+            previous_actions = actions
+            done = stable >= stable_sweeps
+
+        if done:
+            if stopping == "sum":
+                log.write(f"\nDifference < {tolerance} . Arret des itérations\n\n")
+            else:
+                log.write(f"\nCritère d'arrêt \"{stopping}\" atteint . Arret des itérations\n\n")
+            break
+        iteration += 1
+
+    low, high = value_bounds(delta, gamma, has_terminals)
+    if stopping == "span":
+        U = np.where(active, U + (low + high) / 2, U)
+        low, high = (low - high) / 2, (high - low) / 2
+    if log.summary:
+        log.write(f"Bornes sur U* : U + [{low:.6g}, {high:.6g}] (écart maximal {high - low:.6g})\n")
+
+    Q = model.q_values(U, gamma)
+    log.write(f"Nombre d'itérations : {iteration}\n")
+    log.write(f"Nombre de mises à jour de Bellman : {iteration * int(active.sum())}\n\n")
+    return U, Q.argmax(axis=1), iteration
+
+def terminal_order(model):
+    """
+    Ordonne les états valides du plus proche au plus éloigné des terminaux
+    (parcours en largeur sur les prédécesseurs) ; les états qui ne mènent à aucun
+    terminal sont placés à la fin, dans l'ordre des indices.
+    """
+    indptr, preds = model.predecessors()
+    seen = model.terminal_mask.copy()
+    queue = deque(np.flatnonzero(seen).tolist())
+    order = []
+    while queue:
+        s = queue.popleft()
+        for p in preds[indptr[s]:indptr[s + 1]].tolist():
+            if not seen[p]:
+                seen[p] = True
+                order.append(p)
+                queue.append(p)
+    order.extend(np.flatnonzero(model.valid_mask & ~seen).tolist())
+    return order
+
+def run_value_iteration_async(model, gamma, tolerance, log, schedule="gauss-seidel", order="index", callback=None):
+    """
+    Itération de la valeur avec mises à jour sur place.
+    schedule="gauss-seidel" : balayages en place, dans l'ordre des indices ou, avec
+    order="terminals", en s'éloignant des terminaux ; arrêt quand la somme des
+    différences d'un balayage passe sous la tolérance.
+    schedule="prioritized" : balayage prioritaire, les états sont mis à jour par ordre
+    décroissant d'erreur de Bellman (tas) et l'erreur de leurs prédécesseurs est
+    recalculée ; arrêt quand aucune erreur ne dépasse tolérance / nombre d'états.
+    callback reçoit les mesures de chaque balayage Gauss-Seidel ; en balayage
+    prioritaire, il reçoit une seule mesure finale (erreur de Bellman restante).
+    Renvoie U, la meilleure action de chaque état et le nombre de balayages (en
+    balayage prioritaire, l'équivalent en balayages : mises à jour / nombre d'états).
+    """
+    next_states = model.next_states.tolist()
+    probs = model.probs.tolist()
+    rewards = model.state_rewards.tolist()
+    U = [0.0] * model.num_states
+    backups = 0
+
+    def backup(s):
+        best_q = -math.inf
+        for outcomes, outcome_probs in zip(next_states[s], probs[s]):
+            q_total = 0.0
+            for next_s, prob in zip(outcomes, outcome_probs):
+                q_total += prob * (rewards[next_s] + gamma * U[next_s])
+            best_q = max(best_q, q_total)
+        return best_q
+
+    if schedule == "gauss-seidel":
+        states = terminal_order(model) if order == "terminals" else np.flatnonzero(model.valid_mask).tolist()
+        sweeps = 1
         while True:
-            log.write(f"Itération {iteration} :\n")
-            U_prime = list(U)
-            max_diff = 0.0
+            if callback is not None:
+                start_time = time.perf_counter()
             sum_diff = 0.0
+            max_diff = 0.0
+            for s in states:
+                new_value = backup(s)
+                diff = abs(new_value - U[s])
+                sum_diff += diff
+                max_diff = max(max_diff, diff)
+                U[s] = new_value
+            backups += len(states)
+            if callback is not None:
+                callback("iteration", iteration=sweeps, residual_sum=sum_diff, residual_max=max_diff,
+                         time=time.perf_counter() - start_time)
+            if log.summary:
+                log.write(f"Balayage {sweeps} : Somme des differences |Us - U'(S)| = {sum_diff:.6f}\n")
 
-            for s in range(num_states):
-                if s in walls or s in terminals:
-                    continue
-                    
-                log.write(f"U'{s}: \n")
-                q_values = {}
-                
-                for action in ACTIONS:
-                    intended_next = apply_move(s, action, grid, rows, cols)
-                    orth_actions = get_orthogonal_actions(action)
-                    orth1_next = apply_move(s, orth_actions[0], grid, rows, cols)
-                    orth2_next = apply_move(s, orth_actions[1], grid, rows, cols)
-                    
-                    r_intended = get_reward(intended_next, grid, cols)
-                    r_orth1 = get_reward(orth1_next, grid, cols)
-                    r_orth2 = get_reward(orth2_next, grid, cols)
-                    
-                    q_intended = 0.8 * (r_intended + gamma * U[intended_next])
-                    q_orth1 = 0.1 * (r_orth1 + gamma * U[orth1_next])
-                    q_orth2 = 0.1 * (r_orth2 + gamma * U[orth2_next])
-                    
-                    q_total = q_intended + q_orth1 + q_orth2
-                    q_values[action] = q_total
-                    
-                    str_intended = f"0.8*{format_q_calc(r_intended, gamma, U[intended_next])}"
-                    str_orth1 = f"0.1*{format_q_calc(r_orth1, gamma, U[orth1_next])}"
-                    str_orth2 = f"0.1*{format_q_calc(r_orth2, gamma, U[orth2_next])}"
-                    
-                    log.write(f"Q(S{s},{action}) = {str_intended} + {str_orth1} + {str_orth2} = {q_total:.4f}\n")
-                
-                best_q = max(q_values.values())
-                U_prime[s] = best_q
-                
-                q_list_str = ", ".join([f"{q_values[a]:.4f}" for a in ACTIONS])
-                log.write(f"U'{s} = max{{{q_list_str}}} = {best_q:.4f}\n\n")
-            
-            log.write(f"UTILITES A L'ITERATION {iteration}:\n")
-            for r in range(rows):
-                row_str = ""
-                for c in range(cols):
-                    s = r * cols + c
-                    if s in walls:
-                        row_str += "  0.000 "
-                    elif grid[r][c] == 1:
-                        row_str += "  1.000 "
-                    elif grid[r][c] == 2:
-                        row_str += " -1.000 "
-                    else:
-                        row_str += f"{U_prime[s]:7.3f} "
-                log.write(row_str + "\n")
-            
-            for s in range(num_states):
-                if s not in walls and s not in terminals:
-                    sum_diff += abs(U[s] - U_prime[s])
-            
-            log.write(f"\nSomme des differences |Us - U'(S)| = {sum_diff:.6f}\n\n")
-            
-            U = U_prime
             if sum_diff < tolerance:
-                log.write(f"Difference < {tolerance} . Arret des itérations\n\n")
+                log.write(f"\nDifference < {tolerance} . Arret des itérations\n\n")
                 break
-            iteration += 1
+            sweeps += 1
+
+    elif schedule == "prioritized":
+        start_time = time.perf_counter()
+        valid_states = np.flatnonzero(model.valid_mask).tolist()
+        threshold = tolerance / max(len(valid_states), 1)
+        indptr, preds = model.predecessors()
+        indptr = indptr.tolist()
+        preds = preds.tolist()
+
+        priority = [0.0] * model.num_states
+        heap = []
+        for s in valid_states:
+            priority[s] = abs(backup(s) - U[s])
+            if priority[s] > threshold:
+                heap.append((-priority[s], s))
+        backups += len(valid_states)
+        heapq.heapify(heap)
+
+        updates = 0
+        while heap:
+            neg_priority, s = heapq.heappop(heap)
+            if -neg_priority != priority[s]:
+                continue
+            U[s] = backup(s)
+            priority[s] = 0.0
+            backups += 1
+            updates += 1
+
+            for p in preds[indptr[s]:indptr[s + 1]]:
+                error = abs(backup(p) - U[p])
+                backups += 1
+                if error > threshold and error != priority[p]:
+                    priority[p] = error
+                    heapq.heappush(heap, (-error, p))
+
+        # Les mises à jour isolées ne sont pas des itérations : elles sont ramenées en balayages.
+        sweeps = math.ceil(backups / max(len(valid_states), 1))
+        if callback is not None:
+            U_array = np.array(U)
+            errors = np.abs(model.q_values(U_array, gamma).max(axis=1) - U_array)[valid_states]
+            callback("iteration", iteration=sweeps, residual_sum=float(errors.sum()),
+                     residual_max=float(errors.max(initial=0.0)), time=time.perf_counter() - start_time)
+        log.write(f"Mises à jour prioritaires : {updates}\n")
+        log.write(f"Erreur de Bellman < {threshold} pour tous les états . Arret des itérations\n\n")
+        log.write(f"Équivalent en balayages complets : {sweeps}\n")
+
+    else:
+        raise ValueError(f"Ordonnancement inconnu : {schedule}")
+
+    if schedule == "gauss-seidel":
+        log.write(f"Nombre d'itérations : {sweeps}\n")
+    log.write(f"Nombre de mises à jour de Bellman : {backups}\n\n")
+
+    U = np.array(U)
+    return U, model.q_values(U, gamma).argmax(axis=1), sweeps
+
+def run_value_iteration_python(model, gamma, tolerance, log, callback=None):
+    """
+    Boucle d'origine, état par état : écrit la trace détaillée de chaque calcul de Q
+    au niveau "full". callback reçoit les mesures de chaque itération.
+    Renvoie U, la meilleure action de chaque état et le nombre d'itérations.
+    """
+    # Copies en listes Python : l'indexation élément par élément y est plus rapide.
+    next_states = model.next_states.tolist()
+    probs = model.probs.tolist()
+    rewards = model.state_rewards.tolist()
+    valid = model.valid_mask.tolist()
+
+    num_states = model.num_states
+    U = [0.0] * num_states
+
+    iteration = 1
+    while True:
+        if callback is not None:
+            start_time = time.perf_counter()
+        log.write(f"Itération {iteration} :\n")
+        U_prime = list(U)
+        sum_diff = 0.0
 
-        log.write("Recherche des actions optimales :\n\n")
-        best_actions = {}
         for s in range(num_states):
-            if s in walls or s in terminals:
+            if not valid[s]:
                 continue
-            log.write(f"S{s}:\n")
+
+            if log.full:
+                log.write(f"U'{s}: \n")
             q_values = {}
-            for action in ACTIONS:
-                intended_next = apply_move(s, action, grid, rows, cols)
-                orth_actions = get_orthogonal_actions(action)
-                orth1_next = apply_move(s, orth_actions[0], grid, rows, cols)
-                orth2_next = apply_move(s, orth_actions[1], grid, rows, cols)
-                
-                r_intended = get_reward(intended_next, grid, cols)
-                r_orth1 = get_reward(orth1_next, grid, cols)
-                r_orth2 = get_reward(orth2_next, grid, cols)
-                
-                q_intended = 0.8 * (r_intended + gamma * U[intended_next])
-                q_orth1 = 0.1 * (r_orth1 + gamma * U[orth1_next])
-                q_orth2 = 0.1 * (r_orth2 + gamma * U[orth2_next])
-                
-                q_total = q_intended + q_orth1 + q_orth2
+
+            for a, action in enumerate(model.actions):
+                q_total, q_trace = q_with_trace(s, a, U, gamma, next_states, probs, rewards, log.full)
                 q_values[action] = q_total
-                
-                str_intended = f"0.8*{format_q_calc(r_intended, gamma, U[intended_next])}"
-                str_orth1 = f"0.1*{format_q_calc(r_orth1, gamma, U[orth1_next])}"
-                str_orth2 = f"0.1*{format_q_calc(r_orth2, gamma, U[orth2_next])}"
-                
-                log.write(f"Q(S{s},{action}) = {str_intended} + {str_orth1} + {str_orth2} = {q_total:.4f}\n")
-                
-            best_action = max(q_values, key=q_values.get)
-            best_actions[s] = best_action
-            q_list_str = ", ".join([f"{q_values[a]:.4f}" for a in ACTIONS])
+                if log.full:
+                    log.write(f"Q(S{s},{action}) = {q_trace}\n")
+
+            best_q = max(q_values.values())
+            U_prime[s] = best_q
+
+            if log.full:
+                q_list_str = ", ".join([f"{q_values[a]:.4f}" for a in model.actions])
+                log.write(f"U'{s} = max{{{q_list_str}}} = {best_q:.4f}\n\n")
+
+        if log.full:
+            log.write(f"UTILITES A L'ITERATION {iteration}:\n")
+            write_utilities_table(model, U_prime, log)
+
+        max_diff = 0.0
+        for s in range(num_states):
+            if valid[s]:
+                sum_diff += abs(U[s] - U_prime[s])
+                max_diff = max(max_diff, abs(U[s] - U_prime[s]))
+        if callback is not None:
+            callback("iteration", iteration=iteration, residual_sum=sum_diff, residual_max=max_diff,
+                     time=time.perf_counter() - start_time)
+
+        log.write(f"\nSomme des differences |Us - U'(S)| = {sum_diff:.6f}\n\n")
+
+        U = U_prime
+        if sum_diff < tolerance:
+            log.write(f"Difference < {tolerance} . Arret des itérations\n\n")
+            break
+        iteration += 1
+
+    log.write("Recherche des actions optimales :\n\n")
+    best_actions = [0] * num_states
+    for s in range(num_states):
+        if not valid[s]:
+            continue
+        if log.full:
+            log.write(f"S{s}:\n")
+        q_values = {}
+        for a, action in enumerate(model.actions):
+            q_total, q_trace = q_with_trace(s, a, U, gamma, next_states, probs, rewards, log.full)
+            q_values[action] = q_total
+            if log.full:
+                log.write(f"Q(S{s},{action}) = {q_trace}\n")
+
+        best_action = max(q_values, key=q_values.get)
+        best_actions[s] = model.action_index[best_action]
+        if log.full:
+            q_list_str = ", ".join([f"{q_values[a]:.4f}" for a in model.actions])
             log.write(f"Meilleure action = argmax{{{q_list_str}}} = {best_action}\n\n")
-            
-        log.write("Meilleure action de chaque état :\n")
-        for r in range(rows):
-            row_str = ""
-            for c in range(cols):
-                s = r * cols + c
-                if grid[r][c] == 3:
-                    row_str += "MUR      "
-                elif grid[r][c] == 1:
-                    row_str += "BUT      "
-                elif grid[r][c] == 2:
-                    row_str += "FANT     "
-                else:
-                    row_str += f"{best_actions[s]:<9}"
-            log.write(row_str + "\n")
-            
-        log.write("\nPlan optimal:\n")
-        current_state = (rows - 1) * cols 
-        path = []
-        visited = set()
-        
-        while current_state not in terminals and current_state not in visited:
-            visited.add(current_state)
-            action = best_actions[current_state]
-            path.append(action)
-            current_state = apply_move(current_state, action, grid, rows, cols)
-            
-        path.append("but")
-        log.write(" -> ".join(path) + "\n")
+
+    if log.summary:
+        write_policy_table(model, best_actions, log)
+        write_optimal_plan(model, best_actions, log)
+
+    return np.array(U), np.array(best_actions), iteration
+
+def run_value_iteration(model, gamma, tolerance, log, engine="python", schedule="synchronous", order="index",
+                        workers=None, callback=None, stopping="sum", stable_sweeps=3):
+    """
+    Résout le modèle par itération de la valeur et écrit les résultats dans la trace.
+    callback (voir metrics.MetricsWriter) reçoit les mesures de chaque itération (une
+    seule mesure finale avec schedule="prioritized", voir run_value_iteration_async)
+    et la durée des phases "sweep" et "logging". stopping et stable_sweeps choisissent
+    le critère d'arrêt du moteur numpy (voir run_value_iteration_numpy). Seul le
+    moteur python synchrone écrit la trace "full" : les autres la refusent (ValueError).
+    Renvoie U, la meilleure action de chaque état et le nombre d'itérations.
+    """
+    if log.full and engine != "python":
+        raise ValueError(f"engine=\"{engine}\" n'écrit pas la trace complète : utiliser trace=\"summary\" ou \"off\"")
+    if log.full and schedule != "synchronous":
+        raise ValueError(f"schedule=\"{schedule}\" n'écrit pas la trace complète : utiliser trace=\"summary\" ou \"off\"")
+    if stopping != "sum" and (engine != "numpy" or schedule != "synchronous"):
+        raise ValueError(f"Le critère d'arrêt {stopping} n'existe qu'avec engine=\"numpy\" en mode synchrone")
+
+    start_time = time.perf_counter()
+    if engine == "python" and schedule == "synchronous":
+        result = run_value_iteration_python(model, gamma, tolerance, log, callback)
+        report_phase(callback, "sweep", start_time)
+        return result
+
+    if engine == "parallel" and model.dynamics is not None:
+        raise ValueError("engine=\"parallel\" ne prend en charge que la dynamique d'origine")
+    if engine == "parallel" and schedule == "synchronous":
+        U, best_actions, iterations = run_value_iteration_parallel(model, gamma, tolerance, log, workers, callback)
+    elif schedule == "synchronous":
+        U, best_actions, iterations = run_value_iteration_numpy(model, gamma, tolerance, log, callback, stopping,
+                                                                stable_sweeps)
+    else:
+        U, best_actions, iterations = run_value_iteration_async(model, gamma, tolerance, log, schedule, order,
+                                                                callback)
+    report_phase(callback, "sweep", start_time)
+
+    start_time = time.perf_counter()
+    if log.summary:
+        log.write("Utilités finales :\n")
+        write_utilities_table(model, U, log)
+        log.write("\n")
+        write_policy_table(model, best_actions, log)
+        write_optimal_plan(model, best_actions, log)
+    report_phase(callback, "logging", start_time)
+    return U, best_actions, iterations
+
+def solve_value_iteration(input_filename="value-iteration.txt", output_filename="log-file_VI.txt", engine="python",
+                          schedule="synchronous", order="index", trace="full", compress=False, workers=None,
+                          cache_dir=None, metrics=None, stopping="sum", stable_sweeps=3, export=None,
+                          dynamics=None, gamma=None, tolerance=None):
+    """
+    Résout la grille par itération de la valeur.
+    engine="python" produit la trace détaillée de chaque calcul de Q,
+    engine="numpy" utilise les tableaux de transitions précalculés (grandes grilles),
+    engine="parallel" répartit chaque balayage par bandes de lignes sur workers
+    processus (un par cœur par défaut, voir ParallelSweeper).
+    schedule="gauss-seidel" ou "prioritized" remplace les itérations synchrones par
+    des mises à jour sur place (voir run_value_iteration_async) ; order="terminals"
+    balaye les états en s'éloignant des terminaux.
+    trace="full" | "summary" | "off" règle le détail de la trace (voir TraceWriter) ;
+    les moteurs autres que python et les mises à jour sur place refusent "full".
+    compress=True écrit la trace en gzip. input_filename est lu par grid_config.load_config
+    (texte, .npy ou .npz) ; cache_dir garde le modèle compilé sur disque entre deux
+    exécutions. metrics (nom de fichier .csv / .jsonl ou callback) reçoit les mesures
+    de convergence et la durée de chaque phase (voir metrics.MetricsWriter).
+    Avec engine="numpy", stopping="max-norm" | "span" | "policy" remplace le critère
+    d'origine sur la somme des écarts (voir run_value_iteration_numpy).
+    export enregistre la politique et U dans un fichier binaire (voir policy_store).
+    dynamics (Dynamics, dictionnaire ou fichier JSON, voir dynamics.Dynamics.from_spec)
+    remplace la dynamique d'origine : dérives, déplacements diagonaux, récompenses.
+    gamma et tolerance remplacent les valeurs du fichier (obligatoires avec une grille
+    .npy) ; un paramètre manquant lève ValueError.
+    Renvoie U et la meilleure action de chaque état.
+    """
+    try:
+        grid, params = load_config(input_filename, POSITIONAL_PARAMS["value_iteration"])
+    except FileNotFoundError:
+        print(f"Erreur : Le fichier {input_filename} est introuvable.")
+        return
+
+    gamma, tolerance = solver_params(params, "value_iteration", input_filename, gamma=gamma, tolerance=tolerance)
+    callback, writer = open_metrics(metrics, "value_iteration")
+    start_time = time.perf_counter()
+    model = load_model(grid, cache_dir, dynamics)
+    report_phase(callback, "model_build", start_time)
+
+    with TraceWriter(output_filename, trace, compress) as log:
+        U, best_actions, _ = run_value_iteration(model, gamma, tolerance, log, engine, schedule, order,
+                                                workers, callback, stopping, stable_sweeps)
+    if writer is not None:
+        writer.close()
+    if export is not None:
+        save_policy(export, model, best_actions, U, gamma)
+    return U, best_actions
 
 if __name__ == "__main__":
-    solve_value_iteration()
\ No newline at end of file
+    solve_value_iteration()